@@ -5,8 +5,28 @@ Main entry point for the research pipeline
 """
 
 import asyncio
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
 import click
 from pathlib import Path
+
+# Configure logging once, before any agent module is imported. Records go through a
+# queue so the actual stream writes happen on a listener thread, not the event loop.
+_log_queue = queue.SimpleQueue()
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(levelname)s %(message)s"))
+_log_listener = logging.handlers.QueueListener(_log_queue, _log_handler)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+_queue_handler = logging.handlers.QueueHandler(_log_queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))  # the listener's handler does the real formatting
+logging.basicConfig(level=os.getenv("LOG_LEVEL", "WARNING").upper(), handlers=[_queue_handler])
+# httpx logs every request at INFO, which floods output during concurrent extraction
+logging.getLogger("httpx").setLevel(logging.WARNING)
+
 from src.pipeline import ResearchPipeline
 from src.database import create_tables
 
@@ -21,9 +41,9 @@ def main(subject: str, output_dir: str, max_sources: int, style: str, skip_media
     """Run AI research pipeline for a given subject"""
     
     if init_db:
-        print("Initializing database...")
+        click.echo("Initializing database...")
         create_tables()
-        print("Database initialized successfully!")
+        click.echo("Database initialized successfully!")
         return
     
     if not subject:
@@ -32,47 +52,57 @@ def main(subject: str, output_dir: str, max_sources: int, style: str, skip_media
         click.echo(ctx.get_help())
         ctx.exit(1)
 
-    print(f"🔍 Starting AI Research Pipeline for: {subject}")
-    print(f"📁 Output directory: {output_dir}")
-    print(f"🌐 Max sources: {max_sources}")
-    print(f"🎬 Script style: {style}")
+    header = [
+        f"🔍 Starting AI Research Pipeline for: {subject}",
+        f"📁 Output directory: {output_dir}",
+        f"🌐 Max sources: {max_sources}",
+        f"🎬 Script style: {style}",
+    ]
     if skip_media:
-        print("⏭️  Skipping media collection")
-    print("-" * 50)
+        header.append("⏭️  Skipping media collection")
+    header.append("-" * 50)
+    click.secho("\n".join(header), fg='cyan')
     
-    # Run the pipeline
+    # Run the pipeline, on uvloop when it's available (not supported on Windows)
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     pipeline = ResearchPipeline()
     results = asyncio.run(pipeline.run(subject, output_dir))
     
     if "error" in results:
-        print(f"❌ Pipeline failed: {results['error']}")
+        click.secho(f"❌ Pipeline failed: {results['error']}", fg='red')
         return
     
-    print("\n✅ Pipeline completed successfully!")
-    print(f"📊 Results saved to: {results['output_dir']}")
-    
-    # Print summary
+    # Build the summary and write it in one go
+    lines = [
+        "\n✅ Pipeline completed successfully!",
+        f"📊 Results saved to: {results['output_dir']}",
+    ]
     steps = results.get("pipeline_steps", {})
     if "discovery" in steps:
-        print(f"🔍 Sources discovered: {steps['discovery'].get('total_found', 0)}")
+        lines.append(f"🔍 Sources discovered: {steps['discovery'].get('total_found', 0)}")
     if "crawling" in steps:
-        print(f"📄 Sources crawled: {len(steps['crawling'])}")
+        lines.append(f"📄 Sources crawled: {len(steps['crawling'])}")
     if "extraction" in steps:
-        print(f"💡 Facts extracted: {len(steps['extraction'])}")
+        lines.append(f"💡 Facts extracted: {len(steps['extraction'])}")
     if "fact_checking" in steps:
         fc = steps['fact_checking']
-        print(f"✅ Claims verified: {fc.get('verified_claims', 0)}/{fc.get('total_claims', 0)}")
+        lines.append(f"✅ Claims verified: {fc.get('verified_claims', 0)}/{fc.get('total_claims', 0)}")
     if "script_generation" in steps:
         sg = steps['script_generation']
         if not sg.get('error'):
-            print(f"📝 Script generated: {sg.get('word_count', 0)} words ({sg.get('estimated_duration', 0)} min)")
+            lines.append(f"📝 Script generated: {sg.get('word_count', 0)} words ({sg.get('estimated_duration', 0)} min)")
     if "voiceover_generation" in steps:
         vg = steps['voiceover_generation']
         if not vg.get('error'):
-            print(f"🎤 Voiceover generated: {vg.get('audio_files_generated', 0)} audio files")
+            lines.append(f"🎤 Voiceover generated: {vg.get('audio_files_generated', 0)} audio files")
     if "media_collection" in steps:
         mc = steps['media_collection']
-        print(f"🎬 Media assets: {mc.get('successfully_downloaded', 0)} files downloaded")
+        lines.append(f"🎬 Media assets: {mc.get('successfully_downloaded', 0)} files downloaded")
+    click.secho("\n".join(lines), fg='green')
 
 if __name__ == "__main__":
     main()
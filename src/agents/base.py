@@ -1,9 +1,76 @@
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 import logging
-import json
+import os
 import re
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from src.config import settings
 from src.llm.base_provider import LLMProvider
+from src.llm.cache import get_llm_cache
+from src.utils import fast_json
+
+_cpu_pool: Optional[ThreadPoolExecutor] = None
+
+def _get_cpu_pool() -> ThreadPoolExecutor:
+    """Return the worker pool shared by all agents for CPU-bound post-processing."""
+    global _cpu_pool
+    if _cpu_pool is None:
+        _cpu_pool = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="agent-cpu")
+    return _cpu_pool
+
+# JSON inside a markdown code fence, optionally tagged "json"
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(.*?)\s*```", re.DOTALL)
+
+_CLOSERS = {'{': '}', '[': ']'}
+
+def _complete_children(s: str, stack):
+    """Yield the finished spans inside the shallowest unclosed span that has any."""
+    for _, _, children in stack:
+        if children:
+            for start, end in children:
+                yield s[start:end]
+            return
+
+def _iter_json_candidates(s: str):
+    """Yield each top-level {...} or [...] span in s, in a single pass.
+
+    Brackets inside JSON strings are ignored. A span that never closes (e.g. a reply
+    cut off at the token limit) or hits a mismatched closer yields the complete spans
+    nested in it instead, so the finished items of a truncated array are kept.
+    """
+    stack = []  # (expected closer, start index, complete child spans)
+    in_str = False
+    esc = False
+    for i, c in enumerate(s):
+        if in_str:
+            if esc:
+                esc = False
+            elif c == '\\':
+                esc = True
+            elif c == '"':
+                in_str = False
+        elif c in _CLOSERS:
+            stack.append((_CLOSERS[c], i, []))
+        elif not stack:
+            continue
+        elif c == '"':
+            in_str = True
+        elif c in '}]':
+            if c != stack[-1][0]:
+                yield from _complete_children(s, stack)
+                stack.clear()
+                continue
+            _, start, _ = stack.pop()
+            if stack:
+                stack[-1][2].append((start, i + 1))
+            else:
+                yield s[start:i + 1]
+    yield from _complete_children(s, stack)
+
+def _is_list_wrapper(obj: Any) -> bool:
+    """Whether obj is an object whose only value is a list, e.g. {"results": [...]}."""
+    return isinstance(obj, dict) and len(obj) == 1 and isinstance(next(iter(obj.values())), list)
 
 class BaseAgent(ABC):
     """Base class for all AI agents"""
@@ -11,75 +78,151 @@ class BaseAgent(ABC):
     def __init__(self, llm_provider: LLMProvider):
         self.llm_provider = llm_provider
         self.logger = logging.getLogger(self.__class__.__name__)
-        logging.basicConfig(level=logging.INFO)
+        # Caps concurrent outbound LLM requests so parallel callers don't trigger 429 storms
+        self._llm_semaphore = asyncio.Semaphore(settings.llm_concurrency or 20)
     
     @abstractmethod
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Process input and return results"""
         pass
 
-    async def call_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
-        """Call the LLM provider."""
-        self.logger.info(f"Making LLM call with temperature {temperature}")
-        response = await self.llm_provider.call_llm(messages, temperature)
-        self.logger.info("LLM call successful.")
+    async def call_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7, model: Optional[str] = None,
+                       json_mode: bool = False, cache: Optional[bool] = None) -> str:
+        """Call the LLM provider, serving repeated requests from the response cache.
+
+        model overrides the provider's default model for this call, e.g. to route
+        simple sub-tasks to a cheaper model. json_mode asks the provider for a single
+        JSON object, so the prompt must request an object (e.g. {"results": [...]}).
+        Only deterministic (temperature 0) calls are cached unless cache says otherwise,
+        so sampled creative output isn't frozen for the cache's lifetime.
+        """
+        if cache is None:
+            cache = temperature == 0
+        llm_cache = get_llm_cache() if cache else None
+        cache_key = None
+        if llm_cache is not None:
+            cache_model = model or getattr(self.llm_provider, "model", self.llm_provider.__class__.__name__)
+            cache_key = llm_cache.make_key(cache_model, temperature, messages, json_mode)
+            cached = await llm_cache.get(cache_key)
+            if cached is not None:
+                self.logger.debug("LLM cache hit.")
+                return cached
+
+        async with self._llm_semaphore:
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("LLM call T=%.2f msgs=%d", temperature, len(messages))
+            response = await self.llm_provider.call_llm(messages, temperature, model=model, json_mode=json_mode)
+
+        # Providers return an empty string on failure; don't cache those
+        if cache_key is not None and response:
+            await llm_cache.put(cache_key, response)
         return response
 
-    def _parse_json_from_response(self, response: str) -> Optional[Any]:
-        """Robustly parse JSON from a string, handling markdown, multiple objects, and other text."""
+    async def call_llm_json(self, messages: List[Dict[str, str]], expected_type: type, temperature: float = 0.0,
+                            model: Optional[str] = None, retries: int = 1) -> Any:
+        """Call the LLM in JSON mode and parse the reply as expected_type (list or dict).
+
+        If a non-empty reply holds no parseable JSON, or its JSON doesn't coerce to a
+        non-empty expected_type (e.g. a bare object where a list was asked for), the
+        model is shown its reply and asked to correct it, up to retries times, before
+        giving up with an empty list/dict.
+        """
+        response = await self.call_llm(messages, temperature, model=model, json_mode=True)
+        parsed = self._parse_json_from_response(response)
+        result = self._coerce_json(parsed, expected_type)
+        for _ in range(retries):
+            if result or not response:
+                break
+            problem = "was not valid JSON" if parsed is None else "did not match the requested JSON format"
+            self.logger.warning("LLM reply %s; asking for a corrected reply.", problem)
+            repair_messages = messages + [
+                {"role": "assistant", "content": response},
+                {"role": "user", "content": f"Your previous reply {problem}. Return ONLY the corrected JSON in the requested format, with no other text."}
+            ]
+            response = await self.call_llm(repair_messages, temperature, model=model, json_mode=True)
+            parsed = self._parse_json_from_response(response)
+            result = self._coerce_json(parsed, expected_type)
+        return result
+
+    async def run_cpu_bound(self, func, *args):
+        """Run a synchronous helper on the shared worker pool so it doesn't block the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_cpu_pool(), func, *args)
+
+    @staticmethod
+    def _coerce_json(result: Any, expected_type: type) -> Any:
+        """Coerce parsed JSON to expected_type, unwrapping a single list inside an object.
+
+        A list holding {"results": [...]} wrappers, e.g. the separate objects collected from
+        a reply that answered twice or added a stray object, is unwrapped only if the wrapper
+        is its sole item; otherwise it is rejected so call_llm_json asks for a repair.
+        """
+        if isinstance(result, expected_type):
+            if expected_type is list and any(_is_list_wrapper(item) for item in result):
+                return next(iter(result[0].values())) if len(result) == 1 else []
+            return result
+        if expected_type is list and isinstance(result, dict):
+            list_values = [v for v in result.values() if isinstance(v, list)]
+            if len(list_values) == 1:
+                return list_values[0]
+        return expected_type()
+
+    def _parse_json_from_response(self, response: str, expected_type: Optional[type] = None) -> Optional[Any]:
+        """Robustly parse JSON from a string, handling markdown, multiple objects, and other text.
+
+        If expected_type (list or dict) is given, the result is coerced to that type:
+        a single-key object wrapping a list (e.g. {"claims": [...]}) is unwrapped, and
+        anything else that doesn't match yields an empty list/dict instead of None.
+        """
+        if expected_type is not None:
+            return self._coerce_json(self._parse_json_from_response(response), expected_type)
+
         if not response:
             self.logger.warning("Cannot parse JSON from empty response.")
             return None
 
-        # Regex to find JSON within a markdown code block (more flexible)
-        # It looks for ``` optionally followed by 'json', then any characters (non-greedy)
-        # until the next ```. It captures the content between the backticks.
-        json_block_match = re.search(r"```(?:json)?\s*(.*?)\s*```", response, re.DOTALL)
+        # Look for JSON within a markdown code block
+        json_block_match = _JSON_BLOCK_RE.search(response)
         if json_block_match:
             json_str = json_block_match.group(1).strip()
             try:
-                self.logger.info(f"Attempting to parse JSON from markdown block: {json_str[:200]}...")
-                return json.loads(json_str)
-            except json.JSONDecodeError as e:
-                self.logger.error(f"Failed to parse JSON from markdown block (content: {json_str[:200]}...): {e}")
+                self.logger.debug("Attempting to parse JSON from markdown block: %.200s...", json_str)
+                return fast_json.loads(json_str)
+            except fast_json.JSONDecodeError as e:
+                self.logger.debug("Failed to parse JSON from markdown block (content: %.200s...): %s", json_str, e)
                 # If parsing from block fails, try parsing the whole response as a fallback
                 pass # Fall through to general parsing attempts
 
         # Try to parse the entire response as a single JSON object or array
         try:
-            self.logger.info(f"Attempting to parse entire response as JSON: {response[:200]}...")
-            return json.loads(response.strip())
-        except json.JSONDecodeError as e:
-            self.logger.warning(f"Could not parse entire response as single JSON object/array: {e}")
+            self.logger.debug("Attempting to parse entire response as JSON: %.200s...", response)
+            return fast_json.loads(response.strip())
+        except fast_json.JSONDecodeError as e:
+            self.logger.debug("Could not parse entire response as single JSON object/array: %s", e)
 
-        # Fallback: Try to find the first and last brackets of an array
-        try:
-            json_start = response.find('[')
-            if json_start != -1:
-                json_end = response.rfind(']')
-                if json_end != -1:
-                    json_str = response[json_start:json_end+1]
-                    self.logger.info(f"Attempting to parse JSON from array brackets: {json_str[:200]}...")
-                    return json.loads(json_str)
-        except json.JSONDecodeError as e:
-            self.logger.warning(f"Could not parse as a single JSON array from brackets: {e}")
-
-        # Fallback: Find all individual JSON objects in the string and return as a list
+        # Fallback: try each balanced {...}/[...] span in order (brackets inside strings are
+        # skipped), so bracketed prose like "[see note]" before the JSON doesn't derail the parse
         found_objects = []
-        # More robust regex for finding objects/arrays that might be scattered
-        for match in re.finditer(r"(\{.*?\}|\[.*?\])", response, re.DOTALL):
+        for candidate in _iter_json_candidates(response):
             try:
-                obj = json.loads(match.group(1))
-                found_objects.append(obj)
-            except json.JSONDecodeError:
+                obj = fast_json.loads(candidate)
+            except fast_json.JSONDecodeError:
                 continue # Ignore non-json parts
-        
+            if isinstance(obj, list):
+                self.logger.debug("Parsed JSON array from response: %.200s...", candidate)
+                return obj
+            found_objects.append(obj)
+
+        # A lone {"results": [...]} wrapper is returned as is, so callers unwrap its list
+        if len(found_objects) == 1 and _is_list_wrapper(found_objects[0]):
+            return found_objects[0]
+
         if found_objects:
-            self.logger.info(f"Successfully parsed {len(found_objects)} individual JSON objects/arrays from response.")
+            self.logger.debug("Successfully parsed %d individual JSON objects/arrays from response.", len(found_objects))
             # If multiple objects are found, and the request was for a single object/array,
             # this might still be problematic. For now, return the list.
             # A more advanced solution might try to combine them or pick the most relevant.
             return found_objects
 
-        self.logger.error(f"Could not find or parse any JSON in response. Raw response: {response[:500]}...")
+        self.logger.error("Could not find or parse any JSON in response. Raw response: %.500s...", response)
         return None
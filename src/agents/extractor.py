@@ -1,39 +1,226 @@
-from typing import Dict, Any, List
-import json
+from typing import Dict, Any, List, Optional
 import re
 import asyncio
-from datetime import datetime, timedelta
+import hashlib
+import logging
+import time
+from datetime import date, datetime
+from functools import lru_cache
+from dateutil.parser import parse as _dtparse
 from src.agents.base import BaseAgent
+from src.config import settings
+from src.utils import fast_json
+from src.utils.tokens import count_tokens, truncate_with_count
+from src.utils.dates import DATE_PATTERNS, MONTH_NAME, month_number
 from src.llm.base_provider import LLMProvider
 
+# Date handling for ExtractorAgent._parse_date, built once at import
+_YMD00_RE = re.compile(r'\d{4}-\d{2}-00')
+_YEAR_RE = re.compile(r'\b(\d{4})\b')
+_DEFAULT_DATE = datetime(1900, 1, 1)  # Fills missing month/day so "1997" parses as 1997-01-01
+# A month name or a numeric day/month; without one, dateutil's fuzzy guess (e.g. "Q3 2019"
+# as March) isn't trusted and only the year is kept
+_MONTH_OR_DAY_RE = re.compile(rf'\b{MONTH_NAME}(?![a-z])|\b\d{{1,4}}[/.-]\d{{1,2}}\b', re.IGNORECASE)
+# Whole-string (pattern, match -> (year, month, day)) forms resolved without dateutil
+_DATE_FORMATS = DATE_PATTERNS + (
+    (re.compile(r'(\d{4})'), lambda m: (int(m.group(1)), 1, 1)),
+    (re.compile(rf'{MONTH_NAME},?\s+(\d{{4}})', re.IGNORECASE), lambda m: (int(m.group(2)), month_number(m.group(1)), 1)),
+)
+
+# Static instruction prefixes, kept byte-identical across calls so provider-side
+# prompt caching can reuse them; only the user message varies per request.
+_CLAIM_EXTRACTION_INSTRUCTIONS = """Your response MUST be a valid JSON array, and contain ONLY the JSON array. Do NOT include any other text, preambles, or explanations.
+
+Your task is to act as a meticulous fact extractor. From the provided documents about the given subject, extract all verifiable, factual claims WITH their semantic components.
+
+**Input Format:**
+You will be given the subject name and the documents as JSONL: one JSON document per line, each with a "source_url" and "content".
+
+**Output Format Rules:**
+1. The output MUST be a valid JSON array of claim objects.
+2. Each object in the array represents a single factual claim from ONE of the documents.
+3. CRITICAL: Each claim object MUST include the "source_url" from which it was extracted.
+4. If no facts are found across all documents, return an empty array: [].
+
+**Enhanced JSON Object Schema for Each Claim:**
+- "claim": (string) The concise factual statement.
+- "date": (string) The date of the event in YYYY-MM-DD format if available, otherwise null.
+- "evidence_snippet": (string) The exact text from the source document that supports the claim.
+- "confidence": (float) Your confidence in the claim's accuracy from 0.0 to 1.0.
+- "source_url": (string) The exact URL of a source document for this claim.
+- "subject": (string) Who/what the claim is about (should be related to the given subject).
+- "predicate": (string) The action or relationship.
+- "object": (string) What happened or the target.
+
+**Example:**
+For claim "Netflix was founded in 1997":
+- "subject": "Netflix"
+- "predicate": "was founded"
+- "object": "1997"
+"""
+
+_ENTITY_EXTRACTION_INSTRUCTIONS = """Break down each claim in the provided JSON array into subject, predicate, and object components.
+
+Return ONLY a JSON array with one object per claim, where the object at position N corresponds to the claim with "index" N, with:
+- "subject": Who/what the claim is about
+- "predicate": The action or relationship
+- "object": What happened or the target
+
+Example format: [{"subject": "Netflix", "predicate": "was founded", "object": "1997"}]
+"""
+
 class RateLimiter:
-    """Rate limiter to track and control API request frequency."""
+    """Leaky-bucket rate limiter that spaces requests evenly at the configured rate."""
     
     def __init__(self, requests_per_minute: int = 50):
         self.requests_per_minute = requests_per_minute
-        self.requests = []
+        self.min_interval = 60.0 / requests_per_minute
+        self._next_slot = time.monotonic()
     
     async def wait_if_needed(self):
-        """Wait if we're approaching rate limits."""
-        now = datetime.now()
-        
-        # Remove requests older than 1 minute
-        self.requests = [req_time for req_time in self.requests 
-                        if now - req_time < timedelta(minutes=1)]
-        
-        if len(self.requests) >= self.requests_per_minute:
-            sleep_time = 60 - (now - self.requests[0]).total_seconds()
-            if sleep_time > 0:
-                print(f"Rate limiter: waiting {sleep_time:.2f}s to avoid rate limit")
-                await asyncio.sleep(sleep_time)
-        
-        self.requests.append(now)
+        """Reserve the next send slot and sleep until it arrives."""
+        # Reserving before awaiting keeps this atomic on the event loop, so concurrent
+        # callers queue one interval apart instead of being released together
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.min_interval
+        sleep_time = slot - now
+        if sleep_time > 0:
+            logging.getLogger(__name__).debug("Rate limiter: waiting %.2fs to avoid rate limit", sleep_time)
+            await asyncio.sleep(sleep_time)
+
+class _RetryBucket:
+    """Shared retry budget: retries spend a token, successful calls earn back a fraction of one.
+
+    During a sustained outage the bucket drains and callers stop retrying instead of
+    multiplying the load on the provider.
+    """
+
+    def __init__(self, max_tokens: float = 10.0, deposit_amount: float = 0.1):
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+        self.deposit_amount = deposit_amount
+
+    def try_consume(self, amount: float = 1.0) -> bool:
+        if self.tokens < amount:
+            return False
+        self.tokens -= amount
+        return True
+
+    def deposit(self, amount: Optional[float] = None):
+        self.tokens = min(self.max_tokens, self.tokens + (self.deposit_amount if amount is None else amount))
+
+class _AdaptiveConcurrencyLimiter:
+    """Concurrency limit that adapts AIMD-style to provider rate limits.
+
+    Each rate limit halves the limit; after a run of successes with no rate limit
+    for a cooldown period it grows back by one, up to max_limit.
+    """
+
+    def __init__(self, max_limit: int, increase_after: int = 10, cooldown_seconds: float = 30.0):
+        self.max_limit = max_limit
+        self.limit = max_limit
+        self.in_flight = 0
+        self.increase_after = increase_after
+        self.cooldown_seconds = cooldown_seconds
+        self._successes = 0
+        self._last_rate_limit = float("-inf")
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def on_rate_limit(self):
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+        self._last_rate_limit = time.monotonic()
+
+    def on_success(self):
+        if self.limit >= self.max_limit:
+            return
+        self._successes += 1
+        if (self._successes >= self.increase_after
+                and time.monotonic() - self._last_rate_limit >= self.cooldown_seconds):
+            # Waiters pick up the extra slot on the next release
+            self.limit += 1
+            self._successes = 0
+
+def _retry_after_seconds(error: Exception) -> Optional[float]:
+    """Return the Retry-After delay carried by an HTTP error, if any."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+# Classifies LLM errors for the retry loop in one pass over the message
+_ERROR_CATEGORY_RE = re.compile(
+    r"(?P<rate_limit>rate limit|429|quota|too many requests)"
+    r"|(?P<context>context length|token limit|maximum context)"
+    r"|(?P<auth>authentication|api key|unauthorized|401|403)",
+    re.IGNORECASE
+)
+
+# Approximate tokens for the keys and punctuation around each document in the JSONL prompt
+_JSONL_DOC_OVERHEAD_TOKENS = 12
+
+@lru_cache(maxsize=None)
+def _claim_prompt_tokens() -> int:
+    """Tokens taken by the static claim-extraction instructions."""
+    return count_tokens(_CLAIM_EXTRACTION_INSTRUCTIONS)
+
+@lru_cache(maxsize=4096)
+def _parse_date(date_str: str) -> str:
+    """Parse various date formats into ISO format with validation.
+
+    Cached on the raw string, since LLM dates like "2020" repeat across claims.
+    """
+    if not date_str or date_str.lower() in ['null', 'none', 'n/a']:
+        return ""
 
-def estimate_tokens(text: str) -> int:
-    """Simple token estimation (roughly 4 chars per token for English)."""
-    return len(text) // 4
+    # Fast path: most LLM dates are already YYYY-MM-DD
+    if len(date_str) == 10 and date_str[4] == '-' and date_str[7] == '-':
+        try:
+            if 1800 <= date.fromisoformat(date_str).year <= 2100:
+                return date_str
+        except ValueError:
+            pass
 
-import logging
+    stripped = date_str.strip()
+    for pattern, to_ymd in _DATE_FORMATS:
+        match = pattern.fullmatch(stripped)
+        if match:
+            try:
+                parsed = date(*to_ymd(match))
+            except ValueError:
+                break  # e.g. a -00 day; handled below
+            return parsed.isoformat() if 1800 <= parsed.year <= 2100 else ""
+
+    if _YMD00_RE.fullmatch(date_str):
+        corrected = date_str.replace('-00', '-01')
+        logging.getLogger(__name__).debug("Corrected malformed date from LLM: %s to %s", date_str, corrected)
+        date_str = corrected
+
+    if _MONTH_OR_DAY_RE.search(date_str):
+        try:
+            dt = _dtparse(date_str, default=_DEFAULT_DATE, fuzzy=True)
+            return dt.strftime('%Y-%m-%d') if 1800 <= dt.year <= 2100 else ""
+        except (ValueError, TypeError, OverflowError):
+            pass  # dateutil rejects impossible dates like "2019-02-30"
+
+    # Keep the year if there is one
+    match = _YEAR_RE.search(date_str)
+    return f"{match.group(1)}-01-01" if match and 1800 <= int(match.group(1)) <= 2100 else ""
 
 class ExtractorAgent(BaseAgent):
     """Agent for extracting facts and claims from web content with comprehensive rate limit optimization."""
@@ -41,8 +228,8 @@ class ExtractorAgent(BaseAgent):
     def __init__(self, llm_provider: LLMProvider, max_documents_per_sub_batch: int = 5, 
                  requests_per_minute: int = 50, max_concurrent_requests: int = 5):
         super().__init__(llm_provider)
-        self.logger = logging.getLogger(__name__) # Initialize logger
         self.max_documents_per_sub_batch = max_documents_per_sub_batch
+        self.max_claims_per_entity_batch = 50
         self.request_delay = 0.1  # 100ms between requests
         self.max_retries = 3
         self.backoff_factor = 2
@@ -50,8 +237,11 @@ class ExtractorAgent(BaseAgent):
         
         # Rate limiting components
         self.rate_limiter = RateLimiter(requests_per_minute)
-        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
+        self.semaphore = _AdaptiveConcurrencyLimiter(max_concurrent_requests)
+        self.retry_bucket = _RetryBucket()
         self.requests_made = 0
+        # Identical prompts issued concurrently share a single in-flight request
+        self._inflight: Dict[str, asyncio.Task] = {}
 
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Extracts facts from a batch of source documents with comprehensive rate limit handling."""
@@ -61,18 +251,18 @@ class ExtractorAgent(BaseAgent):
         if not sources:
             return {"claims": [], "error": "No sources provided"}
         
-        print(f"Processing {len(sources)} sources for {company_name}")
+        self.logger.info("Processing %d sources for %s", len(sources), subject_name)
         
         # Dynamically adjust batch size based on content length
         sources = self._optimize_batch_sizes(sources)
         
         # Extract claims from the batch of sources
-        claims = await self._extract_claims_from_batch(sources, company_name)
+        claims = await self._extract_claims_from_batch(sources, subject_name)
         
         # Enhance claims in batches to reduce API calls
         enhanced_claims = await self._enhance_claims_batch(claims)
         
-        print(f"Completed processing. Made {self.requests_made} API requests total")
+        self.logger.info("Completed processing. Made %d API requests total", self.requests_made)
         
         return {
             "claims": enhanced_claims,
@@ -81,758 +271,267 @@ class ExtractorAgent(BaseAgent):
         }
 
     def _optimize_batch_sizes(self, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Optimize content length and batch sizes based on token estimation."""
+        """Truncate source content to the per-source token budget and record its token count."""
         optimized_sources = []
         
         for source in sources:
             content = source.get("content", "")
             
-            # Estimate tokens and truncate if necessary
-            estimated_tokens = estimate_tokens(content)
-            if estimated_tokens > 3000:  # Leave room for prompt and response
-                # Truncate but try to keep complete sentences
-                truncated_content = content[:3000 * 4]  # Rough char limit
-                
-                # Find the last complete sentence
-                last_period = truncated_content.rfind('.')
-                if last_period > len(truncated_content) * 0.8:  # If we're close to the end
-                    truncated_content = truncated_content[:last_period + 1]
-                
+            truncated_content, token_count = truncate_with_count(content, settings.extractor_ctx_tokens)
+            if len(truncated_content) < len(content):
                 source["content"] = truncated_content
                 source["was_truncated"] = True
+            source["_token_count"] = token_count
             
             optimized_sources.append(source)
         
         return optimized_sources
+
+    def _plan_sub_batches(self, sources: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Group sources into sub-batches that fit both the document and token budgets."""
+        # The instructions are sent with every sub-batch, so they come out of the budget first
+        budget = settings.extractor_batch_tokens - _claim_prompt_tokens()
+        sub_batches = []
+        current, current_tokens = [], 0
+        for source in sources:
+            tokens = source.get("_token_count")
+            if tokens is None:
+                tokens = count_tokens(source.get("content", ""))
+            # JSONL framing: the URL plus the {"source_url":..,"content":..} keys
+            tokens += count_tokens(source.get("url") or "") + _JSONL_DOC_OVERHEAD_TOKENS
+            if current and (len(current) >= self.max_documents_per_sub_batch
+                            or current_tokens + tokens > budget):
+                sub_batches.append(current)
+                current, current_tokens = [], 0
+            current.append(source)
+            current_tokens += tokens
+        if current:
+            sub_batches.append(current)
+        return sub_batches
         
-    async def _extract_claims_from_batch(self, sources: List[Dict[str, Any]], company_name: str) -> List[Dict[str, Any]]:
+    async def _extract_claims_from_batch(self, sources: List[Dict[str, Any]], subject_name: str) -> List[Dict[str, Any]]:
         """Extracts factual claims with enhanced prompt to include entities in one call."""
         
+        # Sub-batch size adapts to the token counts recorded by _optimize_batch_sizes.
+        # Sub-batches run concurrently; self.semaphore bounds how many calls are in flight.
+        tasks = [
+            self._process_sub_batch(sub_batch_sources, subject_name, batch_number)
+            for batch_number, sub_batch_sources in enumerate(self._plan_sub_batches(sources), start=1)
+        ]
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+
         all_extracted_claims = []
-        
-        # Dynamically adjust sub-batch size based on content
-        for i in range(0, len(sources), self.max_documents_per_sub_batch):
-            sub_batch_sources = sources[i:i + self.max_documents_per_sub_batch]
-            
-            # Check total token estimate for this sub-batch
-            total_content_length = sum(len(s.get("content", "")) for s in sub_batch_sources)
-            
-            # If sub-batch is too large, reduce it
-            if estimate_tokens(str(total_content_length)) > 2500:
-                # Reduce sub-batch size
-                actual_batch_size = max(1, len(sub_batch_sources) // 2)
-                sub_batch_sources = sub_batch_sources[:actual_batch_size]
-            
-            # Prepare the documents for the prompt
-            prompt_documents = []
-            for source in sub_batch_sources:
-                prompt_documents.append({
-                    "source_url": source.get("url"),
-                    "content": source.get("content", "")
-                })
-
-            # Enhanced prompt to extract claims AND entities in one call
-            prompt = f"""Your response MUST be a valid JSON array, and contain ONLY the JSON array. Do NOT include any other text, preambles, or explanations.
-
-            Your task is to act as a meticulous fact extractor. From the provided JSON array of documents about {company_name}, extract all verifiable, factual claims WITH their semantic components.
-
-            **Input Format:**
-            You will be given a JSON array of document objects, where each object has a "source_url" and "content".
-
-            **Output Format Rules:**
-            1. The output MUST be a valid JSON array of claim objects.
-            2. Each object in the array represents a single factual claim from ONE of the documents.
-            3. CRITICAL: Each claim object MUST include the "source_url" from which it was extracted.
-            4. If no facts are found across all documents, return an empty array: [].
-
-            **Enhanced JSON Object Schema for Each Claim:**
-            - "claim": (string) The concise factual statement.
-            - "date": (string) The date of the event in YYYY-MM-DD format if available, otherwise null.
-            - "evidence_snippet": (string) The exact text from the source document that supports the claim.
-            - "confidence": (float) Your confidence in the claim's accuracy from 0.0 to 1.0.
-            - "source_url": (string) The exact URL of the source document for this claim.
-            - "subject": (string) Who/what the claim is about.
-            - "predicate": (string) The action or relationship.
-            - "object": (string) What happened or the target.
-
-            **Example:**
-            For claim "Netflix was founded in 1997":
-            - "subject": "Netflix"
-            - "predicate": "was founded"
-            - "object": "1997"
-
-            **Now, extract facts from the following documents:**
-
-            {json.dumps(prompt_documents, indent=2)}
-            """
-
-            messages = [{"role": "user", "content": prompt}]
-            
-            # Make API call with comprehensive rate limiting
-            response = await self._call_llm_with_comprehensive_backoff(messages, temperature=0.0)
-            
-            if response is not None:
-                try:
-                    # Use robust JSON parsing instead of direct json.loads
-                    claims = self._parse_llm_json_response(response, list)
-                    if claims:  # Check if we got a non-empty list
-                        # Parse dates for each claim
-                        for claim in claims:
-                            date_str = claim.get("date", "")
-                            if date_str:
-                                parsed_date = self._parse_date(date_str)
-                                if parsed_date:  # Only set if valid
-                                    claim["parsed_date"] = parsed_date
-                        
-                        all_extracted_claims.extend(claims)
-                        print(f"Extracted {len(claims)} claims from sub-batch {i//self.max_documents_per_sub_batch + 1}")
-                    else:
-                        print(f"No claims extracted from sub-batch {i//self.max_documents_per_sub_batch + 1}")
-                except Exception as e:
-                    print(f"An unexpected error occurred during sub-batch claim extraction: {e}")
-            else:
-                print(f"LLM call returned None for sub-batch {i//self.max_documents_per_sub_batch + 1}")
-                print("This usually indicates API failures, rate limiting, or authentication issues")
+        for batch_number, result in enumerate(results, start=1):
+            if isinstance(result, Exception):
+                self.logger.error("Sub-batch %d failed: %s", batch_number, result)
+                continue
+            all_extracted_claims.extend(result)
         
         return all_extracted_claims
 
-    async def _enhance_claims_batch(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Enhance multiple claims in a single API call if needed (fallback for missing entities)."""
-        
-        # Check if claims already have entity information
-        claims_needing_enhancement = []
-        enhanced_claims = []
-        
-        for claim in claims:
-            if not all(key in claim for key in ["subject", "predicate", "object"]):
-                claims_needing_enhancement.append(claim)
-            else:
-                enhanced_claims.append(claim)
-        
-        # If no claims need enhancement, return as-is
-        if not claims_needing_enhancement:
-            return claims
-        
-        # Process in batches of 10 claims at a time
-        batch_size = 10
-        for i in range(0, len(claims_needing_enhancement), batch_size):
-            batch_claims = claims_needing_enhancement[i:i + batch_size]
-            
-            # Create batch enhancement prompt
-            claims_text = []
-            for idx, claim in enumerate(batch_claims):
-                claims_text.append(f"{idx}: {claim.get('claim', '')}")
-            
-            prompt = f"""Break down these claims into subject, predicate, and object components:
-
-            Claims:
-            {chr(10).join(claims_text)}
-
-            Return a JSON array where each object corresponds to the claim at the same index, with:
-            - "subject": Who/what the claim is about
-            - "predicate": The action or relationship  
-            - "object": What happened or the target
-
-            Example format: [{{"subject": "Netflix", "predicate": "was founded", "object": "1997"}}]
-            """
-            
-            messages = [{"role": "user", "content": prompt}]
-            response = await self._call_llm_with_comprehensive_backoff(messages, temperature=0.1)
-            
-            if response:
-                try:
-                    entities_batch = json.loads(response)
-                    if isinstance(entities_batch, list) and len(entities_batch) == len(batch_claims):
-                        for claim, entities in zip(batch_claims, entities_batch):
-                            claim.update({
-                                "subject": entities.get("subject", ""),
-                                "predicate": entities.get("predicate", ""),
-                                "object": entities.get("object", "")
-                            })
-                            enhanced_claims.append(claim)
-                    else:
-                        # Fallback: add empty entities
-                        for claim in batch_claims:
-                            claim.update({"subject": "", "predicate": "", "object": ""})
-                            enhanced_claims.append(claim)
-                except json.JSONDecodeError:
-                    # Fallback: add empty entities
-                    for claim in batch_claims:
-                        claim.update({"subject": "", "predicate": "", "object": ""})
-                        enhanced_claims.append(claim)
-            else:
-                    # Fallback: add empty entities
-                    for claim in batch_claims:
-                        claim.update({"subject": "", "predicate": "", "object": ""})
-                        enhanced_claims.append(claim)
-            
-            # Add delay between enhancement batches
-            if i + batch_size < len(claims_needing_enhancement):
-                await asyncio.sleep(self.request_delay)
-        
-        return enhanced_claims
-
-    async def _call_llm_with_comprehensive_backoff(self, messages: List[Dict], temperature: float = 0.0) -> str:
-        """Make LLM call with comprehensive rate limiting including semaphores and rate limiter."""
-        
-        async with self.semaphore:  # Limit concurrent requests
-            await self.rate_limiter.wait_if_needed()  # Check rate limits
-            
-            for attempt in range(self.max_retries + 1):
-                try:
-                    # Add debug logging
-                    print(f"Making LLM call (attempt {attempt + 1}/{self.max_retries + 1})")
-                    response = await self.call_llm(messages, temperature=temperature)
-                    self.requests_made += 1
-                    print(f"LLM call successful. Total requests: {self.requests_made}")
-                    return response
-                    
-                except Exception as e:
-                    error_str = str(e).lower()
-                    print(f"LLM call failed on attempt {attempt + 1}: {e}")
-                    
-                    # Check if it's a rate limit error
-                    if any(term in error_str for term in ["rate limit", "429", "quota", "too many requests"]):
-                        if attempt < self.max_retries:
-                            wait_time = self.request_delay * (self.backoff_factor ** attempt) * 10  # Longer waits for rate limits
-                            print(f"Rate limit hit. Waiting {wait_time:.2f}s before retry {attempt + 1}/{self.max_retries}")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"Max retries reached for rate limit error: {e}")
-                            return None
-                    
-                    # Check for context length errors
-                    elif any(term in error_str for term in ["context length", "token limit", "maximum context"]):
-                        print(f"Context length error - prompt too long: {e}")
-                        return None
-                    
-                    # Check for authentication errors
-                    elif any(term in error_str for term in ["authentication", "api key", "unauthorized", "401", "403"]):
-                        print(f"Authentication error: {e}")
-                        return None
-                    
-                    # Other errors
-                    else:
-                        print(f"Non-rate-limit error: {e}")
-                        if attempt < self.max_retries:
-                            wait_time = self.request_delay * (self.backoff_factor ** attempt)
-                            print(f"Retrying in {wait_time:.2f}s...")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            print(f"Max retries reached for error: {e}")
-                            return None
-            
-            print("All retry attempts exhausted")
-            return None
-
-    def _parse_date(self, date_str: str) -> str:
-        """Parse various date formats into ISO format with validation."""
-        if not date_str or date_str.lower() in ['null', 'none', 'n/a']:
-            return ""
-
-        # Handle YYYY-MM-00 format by correcting to YYYY-MM-01
-        if re.fullmatch(r'\d{4}-\d{2}-00', date_str):
-            date_str = date_str.replace('-00', '-01')
-            self.logger.warning(f"Corrected malformed date from LLM: {date_str} to {date_str}")
-    
-        # Quick regex patterns for common formats with validation
-        patterns = [
-            (r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b', self._validate_ymd_date),
-            (r'\b(\d{4})\b', lambda m: f"{m.group(1)}-01-01"),
-            (r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})\b', self._parse_month_date)
+    async def _process_sub_batch(self, sub_batch_sources: List[Dict[str, Any]], subject_name: str,
+                                 batch_number: int) -> List[Dict[str, Any]]:
+        """Extract claims from one sub-batch of sources with a single LLM call."""
+        # Prepare the documents for the prompt
+        prompt_documents = []
+        for source in sub_batch_sources:
+            prompt_documents.append({
+                "source_url": source.get("url"),
+                "content": source.get("content", "")
+            })
+
+        # Canonical form (sorted keys, no whitespace) keeps identical documents byte-identical across calls
+        documents_jsonl = "\n".join(fast_json.dumps(doc, sort_keys=True) for doc in prompt_documents)
+
+        # Enhanced prompt to extract claims AND entities in one call
+        messages = [
+            {"role": "system", "content": _CLAIM_EXTRACTION_INSTRUCTIONS},
+            {"role": "user", "content": f"Subject: {subject_name}\n\nDocuments (JSONL):\n{documents_jsonl}"}
         ]
         
-        for pattern, formatter in patterns:
-            match = re.search(pattern, date_str, re.IGNORECASE)
-            if match:
-                try:
-                    result = formatter(match)
-                    # Validate the result is a proper date
-                    if result and self._is_valid_date(result):
-                        return result
-                except:
-                    continue
+        # Make API call with comprehensive rate limiting
+        response = await self._call_llm_with_comprehensive_backoff(messages, temperature=0.0)
         
-        # Fallback to dateutil if available
-        try:
-            from dateutil.parser import parse
-            dt = parse(date_str)
-            return dt.strftime('%Y-%m-%d')
-        except (ImportError, ValueError, TypeError):
-            return ""
-    
-    def _parse_llm_json_response(self, response: str, expected_type: type = list) -> Any:
-        """Parse LLM JSON response with robust error handling, including markdown code blocks."""
-        if not response:
-            self.logger.warning("LLM response is empty.")
-            return [] if expected_type == list else {}
-
-        cleaned_response = response.strip()
-
-        # 1. Try to extract JSON from markdown code blocks (```json ... ```)
-        json_block_match = re.search(r'```json\s*(.*?)\s*```', cleaned_response, re.DOTALL)
-        if json_block_match:
-            json_content = json_block_match.group(1)
-            try:
-                result = json.loads(json_content)
-                if isinstance(result, expected_type):
-                    self.logger.info("Successfully parsed JSON from markdown block.")
-                    return result
-                else:
-                    self.logger.warning(f"JSON from markdown block is not of expected type {expected_type.__name__}.")
-            except json.JSONDecodeError as e:
-                self.logger.warning(f"Failed to parse JSON from markdown block: {e}. Content: {json_content[:200]}...")
+        if response is None:
+            self.logger.error("LLM call returned None for sub-batch %d", batch_number)
+            return []
 
-        # 2. Try direct JSON parsing (if no markdown block or parsing failed)
-        try:
-            result = json.loads(cleaned_response)
-            if isinstance(result, expected_type):
-                self.logger.info("Successfully parsed direct JSON response.")
-                return result
-            else:
-                self.logger.warning(f"Direct JSON response is not of expected type {expected_type.__name__}.")
-        except json.JSONDecodeError as e:
-            self.logger.warning(f"Failed to parse direct JSON response: {e}. Content: {cleaned_response[:200]}...")
-
-        # 3. Fallback: Try to extract JSON by finding the first and last delimiters
-        start_idx = -1
-        end_idx = -1
-
-        if expected_type == list:
-            start_idx = cleaned_response.find('[')
-            end_idx = cleaned_response.rfind(']')
-        elif expected_type == dict:
-            start_idx = cleaned_response.find('{')
-            end_idx = cleaned_response.rfind('}')
-
-        if start_idx != -1 and end_idx != -1 and start_idx < end_idx:
-            json_substring = cleaned_response[start_idx : end_idx + 1]
-            try:
-                result = json.loads(json_substring)
-                if isinstance(result, expected_type):
-                    self.logger.info("Successfully parsed JSON by finding delimiters.")
-                    return result
-                else:
-                    self.logger.warning(f"JSON from delimiters is not of expected type {expected_type.__name__}.")
-            except json.JSONDecodeError as e:
-                self.logger.warning(f"Failed to parse JSON from delimiters: {e}. Content: {json_substring[:200]}...")
+        # Parsing and per-claim post-processing is pure CPU work; keep it off the event loop
+        claims = await self.run_cpu_bound(self._postprocess_claims, response, sub_batch_sources)
+        if claims:
+            self.logger.info("Extracted %d claims from sub-batch %d", len(claims), batch_number)
         else:
-            self.logger.warning("Could not find valid JSON delimiters in response.")
+            self.logger.warning("No claims extracted or parsed from sub-batch %d", batch_number)
+        return claims
+
+    def _postprocess_claims(self, response: str, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Parse an extraction response, then parse dates and locate evidence for each claim."""
+        content_by_url = {s.get("url"): s.get("content", "") for s in sources}
+        claims = []
+        for claim in self._parse_json_from_response(response, list):
+            # Stray strings or numbers in the array aren't claims and would break later stages
+            if not isinstance(claim, dict):
+                continue
+            date_str = claim.get("date", "")
+            if date_str:
+                parsed_date = _parse_date(str(date_str))
+                if parsed_date:  # Only set if valid
+                    claim["parsed_date"] = parsed_date
+            self._locate_evidence(claim, content_by_url.get(claim.get("source_url"), ""))
+            claims.append(claim)
+        return claims
+
+    def _locate_evidence(self, claim: Dict[str, Any], content: str):
+        """Record the character span of the claim's evidence snippet within its source content."""
+        evidence = claim.get("evidence_snippet")
+        if not evidence or not isinstance(evidence, str) or not content:
+            return
+
+        start_pos = content.find(evidence)
+        if start_pos == -1 and len(evidence) > 64:
+            # The LLM often paraphrases the tail of long snippets, so anchor on the prefix
+            start_pos = content.find(evidence[:64])
+        if start_pos != -1:
+            claim["start_char"] = start_pos
+            claim["end_char"] = min(start_pos + len(evidence), len(content))
 
-        self.logger.error(f"Could not parse JSON from LLM response. Returning empty {expected_type.__name__}. Raw response: {response[:500]}...")
-        return [] if expected_type == list else {}
-    
-    from typing import Dict, Any, List
-import json
-import re
-import asyncio
-from datetime import datetime, timedelta
-from src.agents.base import BaseAgent
-from src.llm.base_provider import LLMProvider
-
-class RateLimiter:
-    """Rate limiter to track and control API request frequency."""
-    
-    def __init__(self, requests_per_minute: int = 50):
-        self.requests_per_minute = requests_per_minute
-        self.requests = []
-    
-    async def wait_if_needed(self):
-        """Wait if we're approaching rate limits."""
-        now = datetime.now()
-        
-        # Remove requests older than 1 minute
-        self.requests = [req_time for req_time in self.requests 
-                        if now - req_time < timedelta(minutes=1)]
-        
-        if len(self.requests) >= self.requests_per_minute:
-            sleep_time = 60 - (now - self.requests[0]).total_seconds()
-            if sleep_time > 0:
-                print(f"Rate limiter: waiting {sleep_time:.2f}s to avoid rate limit")
-                await asyncio.sleep(sleep_time)
-        
-        self.requests.append(now)
+    async def _enhance_claims_batch(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Enhance claims missing entity information (fallback for missing entities)."""
 
-def estimate_tokens(text: str) -> int:
-    """Simple token estimation (roughly 4 chars per token for English)."""
-    return len(text) // 4
+        # Single pass; claims are updated in place, so the original order is kept
+        claims_needing_enhancement = [
+            c for c in claims if not (c.get("subject") and c.get("predicate") and c.get("object"))
+        ]
 
-import logging
+        if not claims_needing_enhancement:
+            return claims
 
-class ExtractorAgent(BaseAgent):
-    """Agent for extracting facts and claims from web content with comprehensive rate limit optimization."""
-    
-    def __init__(self, llm_provider: LLMProvider, max_documents_per_sub_batch: int = 5, 
-                 requests_per_minute: int = 50, max_concurrent_requests: int = 5):
-        super().__init__(llm_provider)
-        self.max_documents_per_sub_batch = max_documents_per_sub_batch
-        self.request_delay = 0.1  # 100ms between requests
-        self.max_retries = 3
-        self.backoff_factor = 2
-        self.max_tokens_per_request = 4000  # Conservative limit
-        
-        # Rate limiting components
-        self.rate_limiter = RateLimiter(requests_per_minute)
-        self.semaphore = asyncio.Semaphore(max_concurrent_requests)
-        self.requests_made = 0
+        # The same fact is often extracted verbatim from several sources; resolve each text once
+        unique_texts = list(dict.fromkeys(c.get("claim", "") for c in claims_needing_enhancement))
 
-    async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Extracts facts from a batch of source documents with comprehensive rate limit handling."""
-        sources = input_data.get("sources", [])
-        subject_name = input_data.get("subject_name", "")
-        
-        if not sources:
-            return {"claims": [], "error": "No sources provided"}
-        
-        self.logger.info(f"Processing {len(sources)} sources for {subject_name}")
-        
-        # Dynamically adjust batch size based on content length
-        sources = self._optimize_batch_sizes(sources)
-        
-        # Extract claims from the batch of sources
-        claims = await self._extract_claims_from_batch(sources, subject_name)
-        
-        # Enhance claims in batches to reduce API calls
-        enhanced_claims = await self._enhance_claims_batch(claims)
-        
-        self.logger.info(f"Completed processing. Made {self.requests_made} API requests total")
-        
-        return {
-            "claims": enhanced_claims,
-            "processed_sources_count": len(sources),
-            "api_requests_made": self.requests_made
-        }
+        # One LLM call per sub-batch; sub-batches run concurrently so a slow response doesn't block the others
+        batch_size = self.max_claims_per_entity_batch
+        sub_batches = [unique_texts[i:i + batch_size] for i in range(0, len(unique_texts), batch_size)]
+        entity_results = await asyncio.gather(*(self._extract_entities_batch(batch) for batch in sub_batches))
 
-    def _optimize_batch_sizes(self, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Optimize content length and batch sizes based on token estimation."""
-        optimized_sources = []
-        
-        for source in sources:
-            content = source.get("content", "")
-            
-            # Estimate tokens and truncate if necessary
-            estimated_tokens = estimate_tokens(content)
-            if estimated_tokens > 3000:  # Leave room for prompt and response
-                # Truncate but try to keep complete sentences
-                truncated_content = content[:3000 * 4]  # Rough char limit
-                
-                # Find the last complete sentence
-                last_period = truncated_content.rfind('.')
-                if last_period > len(truncated_content) * 0.8:  # If we're close to the end
-                    truncated_content = truncated_content[:last_period + 1]
-                
-                source["content"] = truncated_content
-                source["was_truncated"] = True
-            
-            optimized_sources.append(source)
-        
-        return optimized_sources
-        
-    async def _extract_claims_from_batch(self, sources: List[Dict[str, Any]], subject_name: str) -> List[Dict[str, Any]]:
-        """Extracts factual claims with enhanced prompt to include entities in one call."""
-        
-        all_extracted_claims = []
-        
-        # Dynamically adjust sub-batch size based on content
-        for i in range(0, len(sources), self.max_documents_per_sub_batch):
-            sub_batch_sources = sources[i:i + self.max_documents_per_sub_batch]
-            
-            # Check total token estimate for this sub-batch
-            total_content_length = sum(len(s.get("content", "")) for s in sub_batch_sources)
-            
-            # If sub-batch is too large, reduce it
-            if estimate_tokens(str(total_content_length)) > 2500:
-                # Reduce sub-batch size
-                actual_batch_size = max(1, len(sub_batch_sources) // 2)
-                sub_batch_sources = sub_batch_sources[:actual_batch_size]
-            
-            # Prepare the documents for the prompt
-            prompt_documents = []
-            for source in sub_batch_sources:
-                prompt_documents.append({
-                    "source_url": source.get("url"),
-                    "content": source.get("content", "")
-                })
-
-            # Enhanced prompt to extract claims AND entities in one call
-            prompt = f"""Your response MUST be a valid JSON array, and contain ONLY the JSON array. Do NOT include any other text, preambles, or explanations.
-
-            Your task is to act as a meticulous fact extractor. From the provided JSON array of documents about the subject '{subject_name}', extract all verifiable, factual claims WITH their semantic components.
-
-            **Input Format:**
-            You will be given a JSON array of document objects, where each object has a "source_url" and "content".
-
-            **Output Format Rules:**
-            1. The output MUST be a valid JSON array of claim objects.
-            2. Each object in the array represents a single factual claim from ONE of the documents.
-            3. CRITICAL: Each claim object MUST include the "source_url" from which it was extracted.
-            4. If no facts are found across all documents, return an empty array: [].
-
-            **Enhanced JSON Object Schema for Each Claim:**
-            - "claim": (string) The concise factual statement.
-            - "date": (string) The date of the event in YYYY-MM-DD format if available, otherwise null.
-            - "evidence_snippet": (string) The exact text from the source document that supports the claim.
-            - "confidence": (float) Your confidence in the claim's accuracy from 0.0 to 1.0.
-            - "source_url": (string) The exact URL of a source document for this claim.
-            - "subject": (string) Who/what the claim is about (should be related to '{subject_name}').
-            - "predicate": (string) The action or relationship.
-            - "object": (string) What happened or the target.
-
-            **Example:**
-            For claim "Netflix was founded in 1997":
-            - "subject": "Netflix"
-            - "predicate": "was founded"
-            - "object": "1997"
-
-            **Now, extract facts from the following documents:**
-
-            {json.dumps(prompt_documents, indent=2)}
-            """
-
-            messages = [{"role": "user", "content": prompt}]
-            
-            # Make API call with comprehensive rate limiting
-            response = await self._call_llm_with_comprehensive_backoff(messages, temperature=0.0)
-            
-            if response is not None:
-                claims = self._parse_json_from_response(response)
-                if claims and isinstance(claims, list):
-                    # Parse dates for each claim
-                    for claim in claims:
-                        date_str = claim.get("date", "")
-                        if date_str:
-                            parsed_date = self._parse_date(date_str)
-                            if parsed_date:  # Only set if valid
-                                claim["parsed_date"] = parsed_date
-                    
-                    all_extracted_claims.extend(claims)
-                    self.logger.info(f"Extracted {len(claims)} claims from sub-batch {i//self.max_documents_per_sub_batch + 1}")
-                else:
-                    self.logger.warning(f"No claims extracted or parsed from sub-batch {i//self.max_documents_per_sub_batch + 1}")
-            else:
-                self.logger.error(f"LLM call returned None for sub-batch {i//self.max_documents_per_sub_batch + 1}")
-        
-        return all_extracted_claims
+        entities_by_text = {}
+        for batch_texts, entities_batch in zip(sub_batches, entity_results):
+            entities_by_text.update(zip(batch_texts, entities_batch))
 
-    async def _enhance_claims_batch(self, claims: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Enhance multiple claims in a single API call if needed (fallback for missing entities)."""
-        
-        claims_needing_enhancement = [c for c in claims if not all(k in c for k in ["subject", "predicate", "object"])]
-        enhanced_claims = [c for c in claims if all(k in c for k in ["subject", "predicate", "object"])]
-        
-        if not claims_needing_enhancement:
-            return claims
-        
-        batch_size = 10
-        for i in range(0, len(claims_needing_enhancement), batch_size):
-            batch_claims = claims_needing_enhancement[i:i + batch_size]
-            
-            claims_text = [f"{idx}: {claim.get('claim', '')}" for idx, claim in enumerate(batch_claims)]
-            
-            prompt = f"""Break down these claims into subject, predicate, and object components:
+        for claim in claims_needing_enhancement:
+            claim.update(entities_by_text[claim.get("claim", "")])
 
-            Claims:
-            {chr(10).join(claims_text)}
+        return claims
 
-            Return a JSON array where each object corresponds to the claim at the same index, with:
-            - "subject": Who/what the claim is about
-            - "predicate": The action or relationship  
-            - "object": What happened or the target
+    async def _extract_entities_batch(self, claim_texts: List[str]) -> List[Dict[str, str]]:
+        """Extract subject/predicate/object for a list of claims in a single LLM call.
 
-            Example format: [{{"subject": "Netflix", "predicate": "was founded", "object": "1997"}}]
-            """
-            
-            messages = [{"role": "user", "content": prompt}]
-            response = await self._call_llm_with_comprehensive_backoff(messages, temperature=0.1)
-            
-            entities_batch = self._parse_json_from_response(response)
-            if entities_batch and isinstance(entities_batch, list) and len(entities_batch) == len(batch_claims):
-                for claim, entities in zip(batch_claims, entities_batch):
-                    claim.update({
-                        "subject": entities.get("subject", ""),
-                        "predicate": entities.get("predicate", ""),
-                        "object": entities.get("object", "")
-                    })
-                    enhanced_claims.append(claim)
-            else:
-                self.logger.warning("Failed to enhance batch, falling back for claims.")
-                for claim in batch_claims:
-                    claim.update({"subject": "", "predicate": "", "object": ""})
-                    enhanced_claims.append(claim)
-            
-            if i + batch_size < len(claims_needing_enhancement):
-                await asyncio.sleep(self.request_delay)
-        
-        return enhanced_claims
+        Returns one entity dict per input claim, aligned by index. Claims the LLM
+        could not decompose get empty entity strings.
+        """
+        empty = {"subject": "", "predicate": "", "object": ""}
+        if not claim_texts:
+            return []
 
-    async def _call_llm_with_comprehensive_backoff(self, messages: List[Dict], temperature: float = 0.0) -> str:
+        numbered_claims = [{"index": idx, "claim": text} for idx, text in enumerate(claim_texts)]
+        messages = [
+            {"role": "system", "content": _ENTITY_EXTRACTION_INSTRUCTIONS},
+            {"role": "user", "content": f"Claims ({len(claim_texts)} total):\n{fast_json.dumps(numbered_claims)}"}
+        ]
+        # Entity decomposition is a simple split, so it can run on a cheaper model if one is configured
+        response = await self._call_llm_with_comprehensive_backoff(messages, temperature=0.0, model=settings.cheap_model)
+
+        # Responses for large batches can be sizeable; parse off the event loop
+        entities_batch = await self.run_cpu_bound(self._parse_json_from_response, response, list)
+        if len(entities_batch) != len(claim_texts):
+            self.logger.warning("Failed to extract entities for a batch of %d claims, falling back to empty entities.", len(claim_texts))
+            return [dict(empty) for _ in claim_texts]
+
+        results = []
+        for entities in entities_batch:
+            if not isinstance(entities, dict):
+                results.append(dict(empty))
+                continue
+            results.append({
+                "subject": entities.get("subject", ""),
+                "predicate": entities.get("predicate", ""),
+                "object": entities.get("object", "")
+            })
+        return results
+
+    async def _call_llm_with_comprehensive_backoff(self, messages: List[Dict], temperature: float = 0.0,
+                                                   model: Optional[str] = None) -> str:
+        """Make LLM call with comprehensive rate limiting, coalescing identical concurrent prompts."""
+        payload = fast_json.dumps({"m": model, "t": temperature, "msgs": messages})
+        key = hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call_llm_with_retries(messages, temperature, model))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled waiter doesn't cancel the request for the others
+        return await asyncio.shield(task)
+
+    async def _call_llm_with_retries(self, messages: List[Dict], temperature: float = 0.0,
+                                     model: Optional[str] = None) -> str:
         """Make LLM call with comprehensive rate limiting including semaphores and rate limiter."""
         
-        async with self.semaphore:
-            await self.rate_limiter.wait_if_needed()
-            
-            for attempt in range(self.max_retries + 1):
-                try:
-                    self.logger.info(f"Making LLM call (attempt {attempt + 1}/{self.max_retries + 1})")
-                    response = await self.call_llm(messages, temperature=temperature)
-                    self.requests_made += 1
-                    self.logger.info(f"LLM call successful. Total requests: {self.requests_made}")
-                    return response
-                    
-                except Exception as e:
-                    error_str = str(e).lower()
-                    self.logger.error(f"LLM call failed on attempt {attempt + 1}: {e}")
-                    
-                    if any(term in error_str for term in ["rate limit", "429", "quota", "too many requests"]):
-                        if attempt < self.max_retries:
-                            wait_time = self.request_delay * (self.backoff_factor ** attempt) * 10
-                            self.logger.warning(f"Rate limit hit. Waiting {wait_time:.2f}s before retry {attempt + 1}/{self.max_retries}")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            self.logger.error(f"Max retries reached for rate limit error: {e}")
+        for attempt in range(self.max_retries + 1):
+            try:
+                # Pacing happens outside the semaphore so a waiting request doesn't hold a slot;
+                # the semaphore only bounds how many calls are in flight
+                await self.rate_limiter.wait_if_needed()
+                async with self.semaphore:
+                    self.logger.debug("Making LLM call (attempt %d/%d)", attempt + 1, self.max_retries + 1)
+                    response = await self.call_llm(messages, temperature=temperature, model=model)
+                self.requests_made += 1
+                self.retry_bucket.deposit()
+                self.semaphore.on_success()
+                self.logger.debug("LLM call successful. Total requests: %d", self.requests_made)
+                return response
+                
+            except Exception as e:
+                self.logger.error("LLM call failed on attempt %d: %s", attempt + 1, e)
+                match = _ERROR_CATEGORY_RE.search(str(e))
+                category = match.lastgroup if match else None
+                
+                if category == "rate_limit":
+                    self.semaphore.on_rate_limit()
+                    if attempt < self.max_retries:
+                        if not self.retry_bucket.try_consume():
+                            self.logger.error("Retry budget exhausted, giving up on rate limit error: %s", e)
                             return None
-                    
-                    elif any(term in error_str for term in ["context length", "token limit", "maximum context"]):
-                        self.logger.error(f"Context length error - prompt too long: {e}")
-                        return None
-                    
-                    elif any(term in error_str for term in ["authentication", "api key", "unauthorized", "401", "403"]):
-                        self.logger.error(f"Authentication error: {e}")
-                        return None
-                    
+                        wait_time = _retry_after_seconds(e)
+                        if wait_time is None:
+                            wait_time = self.request_delay * (self.backoff_factor ** attempt) * 10
+                        self.logger.warning("Rate limit hit. Waiting %.2fs before retry %d/%d", wait_time, attempt + 1, self.max_retries)
+                        await asyncio.sleep(wait_time)
+                        continue
                     else:
-                        if attempt < self.max_retries:
-                            wait_time = self.request_delay * (self.backoff_factor ** attempt)
-                            self.logger.warning(f"Retrying in {wait_time:.2f}s...")
-                            await asyncio.sleep(wait_time)
-                            continue
-                        else:
-                            self.logger.error(f"Max retries reached for error: {e}")
+                        self.logger.error("Max retries reached for rate limit error: %s", e)
+                        return None
+                
+                elif category == "context":
+                    self.logger.error("Context length error - prompt too long: %s", e)
+                    return None
+                
+                elif category == "auth":
+                    self.logger.error("Authentication error: %s", e)
+                    return None
+                
+                else:
+                    if attempt < self.max_retries:
+                        if not self.retry_bucket.try_consume():
+                            self.logger.error("Retry budget exhausted, giving up on error: %s", e)
                             return None
-            
-            self.logger.error("All retry attempts exhausted")
-            return None
-
-    def _parse_date(self, date_str: str) -> str:
-        """Parse various date formats into ISO format with validation."""
-        if not date_str or date_str.lower() in ['null', 'none', 'n/a']:
-            return ""
-
-        if re.fullmatch(r'\d{4}-\d{2}-00', date_str):
-            date_str = date_str.replace('-00', '-01')
-            self.logger.warning(f"Corrected malformed date from LLM: {date_str} to {date_str}")
-    
-        patterns = [
-            (r'\b(\d{4})-(\d{1,2})-(\d{1,2})\b', self._validate_ymd_date),
-            (r'\b(\d{4})\b', lambda m: f"{m.group(1)}-01-01"),
-            (r'\b(January|February|March|April|May|June|July|August|September|October|November|December)\s+(\d{1,2}),?\s+(\d{4})\b', self._parse_month_date)
-        ]
-        
-        for pattern, formatter in patterns:
-            match = re.search(pattern, date_str, re.IGNORECASE)
-            if match:
-                try:
-                    result = formatter(match)
-                    if result and self._is_valid_date(result):
-                        return result
-                except:
-                    continue
-        
-        try:
-            from dateutil.parser import parse
-            dt = parse(date_str)
-            return dt.strftime('%Y-%m-%d')
-        except (ImportError, ValueError, TypeError):
-            return ""
-    
-    def _validate_ymd_date(self, match) -> str:
-        """Validate and format YYYY-MM-DD date."""
-        try:
-            year, month, day = map(int, match.groups())
-            if 1800 <= year <= 2100 and 1 <= month <= 12 and 1 <= day <= 31:
-                # Further validation for days in month could be added here
-                return f"{year}-{month:02d}-{day:02d}"
-        except (ValueError, TypeError):
-            pass
-        return ""
-    
-    def _is_valid_date(self, date_str: str) -> bool:
-        """Check if date string represents a valid date."""
-        try:
-            datetime.strptime(date_str, '%Y-%m-%d')
-            return True
-        except ValueError:
-            return False
-    
-    def _parse_month_date(self, match) -> str:
-        """Helper to parse month name dates with validation."""
-        try:
-            month_name, day, year = match.groups()
-            month_map = {
-                'january': 1, 'february': 2, 'march': 3, 'april': 4, 'may': 5, 'june': 6,
-                'july': 7, 'august': 8, 'september': 9, 'october': 10, 'november': 11, 'december': 12
-            }
-            month = month_map[month_name.lower()]
-            return f"{year}-{month:02d}-{int(day):02d}"
-        except (ValueError, KeyError):
-            return ""
-
-    
-    def _is_valid_date(self, date_str: str) -> bool:
-        """Check if date string represents a valid date."""
-        try:
-            parts = date_str.split('-')
-            if len(parts) != 3:
-                return False
-            
-            year, month, day = map(int, parts)
-            
-            # Basic range checks
-            if year < 1800 or year > 2100:
-                return False
-            if month < 1 or month > 12:
-                return False
-            if day < 1 or day > 31:
-                return False
-            
-            # Try to create a date to validate
-            from datetime import date
-            date(year, month, day)
-            return True
-        except (ValueError, ImportError):
-            return False
-    
-    def _parse_month_date(self, match) -> str:
-        """Helper to parse month name dates with validation."""
-        month_name, day, year = match.groups()
+                        wait_time = self.request_delay * (self.backoff_factor ** attempt)
+                        self.logger.warning("Retrying in %.2fs...", wait_time)
+                        await asyncio.sleep(wait_time)
+                        continue
+                    else:
+                        self.logger.error("Max retries reached for error: %s", e)
+                        return None
         
-        try:
-            day_int = int(day)
-            year_int = int(year)
-            
-            # Validate ranges
-            if year_int < 1800 or year_int > 2100:
-                return ""
-            if day_int < 1 or day_int > 31:
-                day_int = 1
-            
-            month_num = {
-                'january': '01', 'february': '02', 'march': '03', 'april': '04',
-                'may': '05', 'june': '06', 'july': '07', 'august': '08',
-                'september': '09', 'october': '10', 'november': '11', 'december': '12'
-            }.get(month_name.lower(), '01')
-            
-            # Additional month-specific day validation
-            if month_num in ['04', '06', '09', '11'] and day_int > 30:
-                day_int = 30
-            elif month_num == '02' and day_int > 29:
-                day_int = 28  # Conservative for February
-            
-            result = f"{year_int}-{month_num}-{day_int:02d}"
-            return result if self._is_valid_date(result) else ""
-            
-        except ValueError:
-            return ""
\ No newline at end of file
+        self.logger.error("All retry attempts exhausted")
+        return None
@@ -1,14 +1,54 @@
-from typing import Dict, Any, List, Tuple
-import json
-from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date, datetime, timedelta
 from src.agents.base import BaseAgent
+from src.config import settings
 from src.models import Subject, Claim, Source, ClaimSource
 from src.database import get_db
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select, update
+import re
 import time
+import uuid
 import asyncio
+from collections import OrderedDict, defaultdict
+from itertools import islice
 from src.llm.base_provider import LLMProvider
+from src.utils.dates import extract_dates
+from src.utils.lexical_index import LexicalIndex
+from src.utils.nli import contradiction_scores, get_nli_classifier
+from src.utils.tokens import count_tokens, truncate_to_tokens, truncate_with_count
+
+# Approximate tokens for the ID, date and labels around each claim in the batch prompt
+_CLAIM_LINE_OVERHEAD_TOKENS = 40
+_SOURCE_CONTENT_TOKENS = 375  # Content shown to the LLM per source, and what the lexical prefilter ranks
+_BATCH_SOURCE_TOKENS = 200  # Content per source in the shared initial batch prompt
+
+# Recently loaded claims and sources per subject slug, so a rerun right after a failure skips the reload
+_SUBJECT_CLAIMS_TTL_SECONDS = 60
+_SUBJECT_CLAIMS_MAX_ENTRIES = 128
+_subject_claims_cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+def _claim_key(claim: Dict[str, Any]) -> Tuple[str, Any]:
+    """Key shared by near-duplicate claims: the same words in the same order, and the same date.
+
+    Only case, punctuation and spacing are ignored. Word order and small words like "by"
+    are kept, since "A acquired B" and "A was acquired by B" are different claims.
+    """
+    return (" ".join(_WORD_RE.findall((claim.get("claim") or "").lower())), claim.get("claim_date"))
+
+def _excerpt(text: str, max_tokens: int) -> str:
+    """Truncate text to max_tokens tokens, marking it with "..." only if something was cut."""
+    excerpt, _ = truncate_with_count(text, max_tokens)
+    return excerpt if excerpt == text else f"{excerpt}..."
+
+def invalidate_subject_claims(subject_slug: Optional[str] = None):
+    """Drop cached claims for one subject, or for every subject if no slug is given."""
+    if subject_slug is None:
+        _subject_claims_cache.clear()
+    else:
+        _subject_claims_cache.pop(subject_slug, None)
 
 class FactCheckerAgent(BaseAgent):
     """Agent for fact-checking and cross-referencing claims"""
@@ -18,6 +58,13 @@ class FactCheckerAgent(BaseAgent):
         self.min_sources_required = 2
         self.confidence_threshold = 0.7
         self.date_tolerance_days = 30
+        self.claims_per_batch = 10  # Larger batch size for speed; accuracy drops past ~16 per prompt
+        self.claim_batch_tokens = 2000  # Claim text per initial status batch
+        self.claims_per_source_check = 10  # Claims checked against one source per LLM call
+        self.source_check_rounds = 3  # Rounds of source checks; claims with enough support skip later support checks
+        self.max_sources_per_claim = settings.fact_check_sources_per_claim  # Lexically closest sources sent to the LLM for each claim
+        self._indexed_sources = None
+        self._source_index = None
     
     async def process(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """Fact-check all claims for a subject"""
@@ -25,27 +72,35 @@ class FactCheckerAgent(BaseAgent):
         if not subject_slug:
             return {"error": "Subject slug required"}
         
+        # One session serves both the initial read and the final write-back
+        db = next(get_db())
         try:
             # Get all claims for the subject
-            claims_data = await self._get_subject_claims(subject_slug)
+            claims_data = await self._get_subject_claims(db, subject_slug)
             if not claims_data or not claims_data.get("claims"):
                 self.logger.warning(f"No claims found for subject: {subject_slug}")
                 return {"error": "No claims found for subject"}
             
+            # End the read transaction so no connection sits idle in it during the LLM checks
+            await asyncio.to_thread(db.rollback)
+            
             # Cross-reference claims
             verification_results = await self.batch_check_facts(claims_data["claims"], claims_data["sources"])
             
             # Update database with verification results
-            await self._update_claim_verification(verification_results)
+            await self._update_claim_verification(db, verification_results)
+            # The cached claims now carry stale confidence and corroboration counts
+            invalidate_subject_claims(subject_slug)
             
             # Generate fact-check report
-            report = self._generate_fact_check_report(verification_results)
+            verified, flagged, contradicted = self._count_verdicts(verification_results)
+            report = self._generate_fact_check_report(verification_results, verified, flagged, contradicted)
             
             return {
                 "subject_slug": subject_slug,
                 "total_claims": len(verification_results),
-                "verified_claims": len([v for v in verification_results if v.get("verified", False)]),
-                "flagged_claims": len([v for v in verification_results if v.get("flagged", False)]),
+                "verified_claims": verified,
+                "flagged_claims": flagged,
                 "verification_results": verification_results,
                 "report": report,
                 "checked_at": datetime.utcnow().isoformat()
@@ -63,42 +118,114 @@ class FactCheckerAgent(BaseAgent):
                 "report": "# Fact-Check Report\n\nFact-checking failed due to processing error.",
                 "checked_at": datetime.utcnow().isoformat()
             }
+        finally:
+            db.close()
 
     async def batch_check_facts(self, claims: List[Dict[str, Any]], sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Batch verify multiple claims against available sources using smaller batches to avoid timeouts."""
         
-        # Process claims in smaller batches to avoid timeout
-        batch_size = 10  # Larger batch size for speed
-        all_verification_results = []
+        # Without sources there is nothing to verify against, so skip the LLM entirely
+        if not sources:
+            self.logger.warning("No sources available; flagging %d claims without checking.", len(claims))
+            return [{
+                "claim_id": claim.get("id"),
+                "claim": claim.get("claim"),
+                "verified": False,
+                "flagged": True,
+                "verification_score": 0.0,
+                "supporting_sources_count": 0,
+                "supporting_sources": [],
+                "date_consistency": {"consistent": True, "note": "N/A"},
+                "contradictions": [],
+                "recommendation": "REJECT - No sources"
+            } for claim in claims]
         
-        for i in range(0, len(claims), batch_size):
-            batch_claims = claims[i:i + batch_size]
-            print(f"Processing fact-check batch {i//batch_size + 1}/{(len(claims) + batch_size - 1)//batch_size}...")
-            
-            batched_prompt_parts = []
-            for j, claim in enumerate(batch_claims):
-                claim_text = claim.get("claim", "")
-                claim_date = claim.get("claim_date")
-                claim_id = claim.get("id")
-                batched_prompt_parts.append(f"Claim {j+1} (ID: {claim_id}):\nClaim Text: \"{claim_text}\"\nClaim Date: {claim_date if claim_date else 'N/A'}\n")
-                
-            # Limit sources to avoid token limits
-            limited_sources = sources[:3]  # Only use top 3 sources per batch
-            sources_text = "\n\n".join([f"Source {s.get('id')}: {s.get('title')} ({s.get('url')})\nContent: {s.get('content', '')[:800]}..." for s in limited_sources])
-            claims_text = '\n'.join(batched_prompt_parts)
+        # Duplicate claims (often the same sentence extracted from several sources) are
+        # checked once; each copy then gets its own date check and result from that verdict
+        claim_keys = [_claim_key(claim) for claim in claims]
+        representatives = {}
+        for key, claim in zip(claim_keys, claims):
+            representatives.setdefault(key, claim)
+        unique_claims = list(representatives.values())
+        if len(unique_claims) < len(claims):
+            self.logger.info("Checking %d unique claims for %d extracted claims.", len(unique_claims), len(claims))
+        
+        # Process claims in smaller batches to avoid timeout; batches run concurrently,
+        # bounded by the shared LLM semaphore, and gather keeps them in claim order
+        batches = self._pack_claim_batches(unique_claims)
+        
+        # Truncate each source by tokens once here rather than once per claim in every prompt.
+        # Only a prefix is tokenized; no token is anywhere near 8 characters on average.
+        for source in sources:
+            if "content_excerpt" not in source:
+                content = (source.get("content") or "")[:_SOURCE_CONTENT_TOKENS * 8]
+                source["content_excerpt"] = truncate_to_tokens(content, _SOURCE_CONTENT_TOKENS)
+        
+        # Limit sources to avoid token limits; the same text leads every batch prompt
+        limited_sources = sources[:3]  # Only use top 3 sources per batch
+        sources_text = "\n\n".join([f"Source {s.get('id')}: {s.get('title')} ({s.get('url')})\nContent: {_excerpt(s['content_excerpt'], _BATCH_SOURCE_TOKENS)}" for s in limited_sources])
+        
+        # The initial status check and the per-source support checks don't depend on each
+        # other, so both stages' LLM calls run together under the shared semaphore
+        batch_checks = asyncio.gather(*(
+            self._check_claim_batch(batch_claims, sources_text, batch_number, len(batches))
+            for batch_number, batch_claims in enumerate(batches, 1)
+        ))
+        batch_results, analysis = await asyncio.gather(batch_checks, self._analyze_claims_by_source(unique_claims, sources))
+        all_verification_results = [result for batch in batch_results for result in batch]
+        
+        # Use zip to safely combine unique claims with LLM results, then fan them back out
+        verdicts = {
+            key: (llm_result, analysis[str(claim['id'])])
+            for (key, claim), llm_result in zip(representatives.items(), all_verification_results)
+        }
+        results = []
+        for key, original_claim in zip(claim_keys, claims):
+            if key not in verdicts:
+                continue
+            llm_result, (supporting_sources, contradictions) = verdicts[key]
+            # Each copy gets its own lists so results for duplicates don't share state
+            results.append(self._verify_claim_safely(
+                original_claim, llm_result, (list(supporting_sources), list(contradictions))
+            ))
+        return results
+    
+    def _pack_claim_batches(self, claims: List[Dict[str, Any]]) -> List[List[Dict[str, Any]]]:
+        """Split claims greedily into batches bounded by claim count and claim-text tokens."""
+        batches = []
+        current = []
+        current_tokens = 0
+        for claim in claims:
+            tokens = count_tokens(claim.get("claim") or "") + _CLAIM_LINE_OVERHEAD_TOKENS
+            if current and (len(current) >= self.claims_per_batch or current_tokens + tokens > self.claim_batch_tokens):
+                batches.append(current)
+                current = []
+                current_tokens = 0
+            current.append(claim)
+            current_tokens += tokens
+        if current:
+            batches.append(current)
+        return batches
+    
+    async def _check_claim_batch(self, batch_claims: List[Dict[str, Any]], sources_text: str,
+                                 batch_number: int, total_batches: int) -> List[Dict[str, Any]]:
+        """Run the initial batched status check for one batch of claims."""
+        self.logger.info("Processing fact-check batch %d/%d...", batch_number, total_batches)
+        results = []
+        batched_prompt_parts = []
+        for j, claim in enumerate(batch_claims):
+            claim_text = claim.get("claim", "")
+            claim_date = claim.get("claim_date")
+            claim_id = claim.get("id")
+            batched_prompt_parts.append(f"Claim {j+1} (ID: {claim_id}):\nClaim Text: \"{claim_text}\"\nClaim Date: {claim_date if claim_date else 'N/A'}\n")
             
-            full_prompt = f"""You are a fact-checking AI. Your task is to verify a list of claims against the provided sources.
+        claims_text = '\n'.join(batched_prompt_parts)
+        
+        # Everything up to the claims is identical across batches, so prefix-caching providers reuse it
+        full_prompt = f"""You are a fact-checking AI. Your task is to verify a list of claims against the provided sources.
 For each claim, determine if it is SUPPORTED, UNSUPPORTED, or REQUIRES_MORE_INFO based on the given sources.
 Also, identify if there are any contradictions within the sources for each claim.
 
-Here are the claims to verify:
-
-{claims_text}
-
-Here are the available sources:
-
-{sources_text}
-
 For each claim, provide a JSON object with the following structure:
 {{
     "claim_id": "The UUID of the claim, provided as (ID: ...)",
@@ -108,139 +235,160 @@ For each claim, provide a JSON object with the following structure:
     "reasoning": "Brief explanation for the status and contradiction_found"
 }}
 
-Return a JSON array of these objects, one for each claim. Ensure the output is valid JSON.
+Return a JSON object of the form {{"results": [...]}} holding one of these objects for each claim.
+
+Here are the available sources:
+
+{sources_text}
+
+Here are the claims to verify:
+
+{claims_text}
 """
-            messages = [{"role": "user", "content": full_prompt}]
+        messages = [{"role": "user", "content": full_prompt}]
+        
+        try:
+            # JSON mode (plus one repair retry) keeps a stray token from flagging the whole batch
+            batch_verification_results = await self.call_llm_json(messages, list)
             
-            try:
-                batched_response = await self.call_llm(messages, temperature=0.1)
-                batch_verification_results = self._parse_json_from_response(batched_response)
-                
-                if batch_verification_results and isinstance(batch_verification_results, list):
-                    all_verification_results.extend(batch_verification_results)
-                else:
-                    # Fallback for failed batch
-                    for claim in batch_claims:
-                        all_verification_results.append({
-                            "claim_id": claim.get("id"),
-                            "claim": claim.get("claim"),
-                            "status": "REQUIRES_MORE_INFO",
-                            "contradiction_found": False,
-                            "reasoning": "Batch processing failed"
-                        })
-            except Exception as e:
-                self.logger.error(f"Error processing batch {i//batch_size + 1}: {e}")
+            if batch_verification_results and isinstance(batch_verification_results, list):
+                # Match verdicts to claims by ID with one dict lookup each, so a dropped or
+                # reordered entry can't shift every later verdict onto the wrong claim
+                verdicts = [r for r in batch_verification_results if isinstance(r, dict)]
+                verdicts_by_id = {str(r.get("claim_id")): r for r in verdicts}
+                one_per_claim = len(verdicts) == len(batch_claims)
+                for j, claim in enumerate(batch_claims):
+                    verdict = verdicts_by_id.get(str(claim.get("id")))
+                    if verdict is None and one_per_claim:
+                        verdict = verdicts[j]  # IDs garbled, but still one verdict per claim in order
+                    results.append(verdict or {
+                        "claim_id": claim.get("id"),
+                        "claim": claim.get("claim"),
+                        "status": "REQUIRES_MORE_INFO",
+                        "contradiction_found": False,
+                        "reasoning": "No verdict returned for this claim"
+                    })
+            else:
                 # Fallback for failed batch
                 for claim in batch_claims:
-                    all_verification_results.append({
+                    results.append({
                         "claim_id": claim.get("id"),
                         "claim": claim.get("claim"),
                         "status": "REQUIRES_MORE_INFO",
                         "contradiction_found": False,
-                        "reasoning": f"Processing error: {str(e)}"
+                        "reasoning": "Batch processing failed"
                     })
-        
-        initial_verification_results = all_verification_results
-
-        if initial_verification_results is None or not isinstance(initial_verification_results, list):
-            self.logger.error("Failed to parse verification results into a list, falling back.")
-            fallback_results = []
-            for claim in claims:
-                fallback_results.append({
+        except Exception as e:
+            self.logger.error(f"Error processing batch {batch_number}: {e}")
+            # Fallback for failed batch
+            for claim in batch_claims:
+                results.append({
                     "claim_id": claim.get("id"),
                     "claim": claim.get("claim"),
-                    "verified": False,
-                    "flagged": True,
-                    "verification_score": 0.1,
-                    "supporting_sources_count": 0,
-                    "supporting_sources": [],
-                    "date_consistency": {"consistent": False, "note": "Fallback due to LLM error"},
-                    "contradictions": [],
-                    "recommendation": "MANUAL_REVIEW_REQUIRED - LLM processing failed"
-                })
-            return fallback_results
-
-        final_verification_results = []
-        # Use zip to safely combine original claims with LLM results
-        for original_claim, llm_result in zip(claims, initial_verification_results):
-            # The trusted ID comes from original_claim. The rest comes from the LLM.
-            llm_result['claim_id'] = original_claim['id'] 
-            
-            try:
-                verification = await self._verify_claim_detailed(original_claim, sources, llm_result)
-                final_verification_results.append(verification)
-            except Exception as e:
-                self.logger.error(f"Error in detailed verification for claim {original_claim['id']}: {e}", exc_info=True)
-                final_verification_results.append({
-                    "claim_id": original_claim['id'],
-                    "claim": original_claim.get("claim", "Unknown Claim"),
-                    "verified": False,
-                    "flagged": True,
-                    "verification_score": 0.0,
-                    "supporting_sources_count": 0,
-                    "supporting_sources": [],
-                    "date_consistency": {"consistent": False, "note": "Detailed verification failed"},
-                    "contradictions": [],
-                    "recommendation": "MANUAL_REVIEW_REQUIRED - Processing error"
+                    "status": "REQUIRES_MORE_INFO",
+                    "contradiction_found": False,
+                    "reasoning": f"Processing error: {str(e)}"
                 })
-        
-        return final_verification_results
+        return results
     
-    async def _get_subject_claims(self, subject_slug: str) -> Dict[str, Any]:
-        db = next(get_db())
-        
+    def _verify_claim_safely(self, original_claim: Dict[str, Any], llm_result: Dict[str, Any],
+                             source_analysis: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Detailed verification for one claim, falling back to a flagged result on error."""
         try:
-            subject = db.query(Subject).filter(Subject.slug == subject_slug).first()
-            if not subject:
-                return None
-            
-
-            claims = db.query(Claim).filter(Claim.parent_subject_id == subject.id).all()
-            sources = db.query(Source).filter(Source.subject_id == subject.id).all()
-            
-            claims_data = []
-            for claim in claims:
-                claims_data.append({
-                    "id": str(claim.id),
-                    "claim": claim.claim,
-                    "claim_date": claim.claim_date.isoformat() if claim.claim_date else None,
-                    "subject": claim.claim_subject,
-                    "predicate": claim.predicate,
-                    "object": claim.object,
-                    "confidence": claim.confidence,
-                    "corroboration_count": claim.corroboration_count
-                })
-            
-            sources_data = []
-            for source in sources:
-                sources_data.append({
-                    "id": str(source.id),
-                    "url": source.url,
-                    "domain": source.domain,
-                    "title": source.title,
-                    "content": source.content,
-                    "reliability": source.reliability,
-                    "published_at": source.published_at.isoformat() if source.published_at else None
-                })
-            
+            # The trusted ID comes from original_claim. The rest comes from the LLM.
+            llm_result = {**llm_result, 'claim_id': original_claim['id']}
+            return self._verify_claim_detailed(original_claim, llm_result, source_analysis)
+        except Exception as e:
+            self.logger.error(f"Error in detailed verification for claim {original_claim['id']}: {e}", exc_info=True)
             return {
-                "subject": {"name": subject.name, "slug": subject.slug},
-                "claims": claims_data,
-                "sources": sources_data
+                "claim_id": original_claim['id'],
+                "claim": original_claim.get("claim", "Unknown Claim"),
+                "verified": False,
+                "flagged": True,
+                "verification_score": 0.0,
+                "supporting_sources_count": 0,
+                "supporting_sources": [],
+                "date_consistency": {"consistent": False, "note": "Detailed verification failed"},
+                "contradictions": [],
+                "recommendation": "MANUAL_REVIEW_REQUIRED - Processing error"
             }
-            
-        finally:
-            db.close()  
-  
-    async def _verify_claim_detailed(self, claim: Dict[str, Any], 
-                                  sources: List[Dict[str, Any]], 
-                                  initial_llm_result: Dict[str, Any]) -> Dict[str, Any]:
-        claim_text = claim.get("claim", "")
-        claim_date = claim.get("claim_date")
+    
+    async def _get_subject_claims(self, db: Session, subject_slug: str) -> Dict[str, Any]:
+        entry = _subject_claims_cache.get(subject_slug)
+        if entry is not None:
+            claims_data, loaded_at = entry
+            if time.monotonic() - loaded_at <= _SUBJECT_CLAIMS_TTL_SECONDS:
+                _subject_claims_cache.move_to_end(subject_slug)
+                return claims_data
+            del _subject_claims_cache[subject_slug]
         
-        supporting_sources = await self._find_supporting_sources(claim_text, sources)
+        # The session is synchronous, so the queries run on a worker thread instead of the event loop
+        claims_data = await asyncio.to_thread(self._load_subject_claims, db, subject_slug)
+        if claims_data is not None:
+            _subject_claims_cache[subject_slug] = (claims_data, time.monotonic())
+            if len(_subject_claims_cache) > _SUBJECT_CLAIMS_MAX_ENTRIES:
+                _subject_claims_cache.popitem(last=False)
+        return claims_data
+    
+    def _load_subject_claims(self, db: Session, subject_slug: str) -> Optional[Dict[str, Any]]:
+        # Column-only Core queries: plain rows, no ORM instances or identity map,
+        # streamed in batches instead of buffering the whole result first. The subject
+        # is resolved inside each query rather than with a lookup round trip of its own.
+        claim_rows = db.execute(
+            select(Claim.id, Claim.claim, Claim.claim_date, Claim.claim_subject, Claim.predicate,
+                   Claim.object, Claim.confidence, Claim.corroboration_count, Subject.name.label("subject_name"))
+            .join(Subject, Claim.parent_subject_id == Subject.id)
+            .where(Subject.slug == subject_slug)
+            .execution_options(yield_per=500)
+        ).mappings()
+        subject_name = None
+        claims_data = []
+        for row in claim_rows:
+            subject_name = row["subject_name"]
+            claims_data.append({
+                "id": str(row["id"]),
+                "claim": row["claim"],
+                "claim_date": row["claim_date"].isoformat() if row["claim_date"] else None,
+                "claim_day": row["claim_date"],  # Kept as a date for the consistency check
+                "subject": row["claim_subject"],
+                "predicate": row["predicate"],
+                "object": row["object"],
+                "confidence": row["confidence"],
+                "corroboration_count": row["corroboration_count"]
+            })
+        if not claims_data:
+            return None  # Unknown subject, or nothing to check
+        
+        subject_id = select(Subject.id).where(Subject.slug == subject_slug).scalar_subquery()
+        source_rows = db.execute(
+            select(Source.id, Source.url, Source.domain, Source.title, Source.content,
+                   Source.reliability, Source.published_at)
+            .where(Source.subject_id == subject_id)
+            .execution_options(yield_per=500)
+        ).mappings()
+        sources_data = [{
+            "id": str(row["id"]),
+            "url": row["url"],
+            "domain": row["domain"],
+            "title": row["title"],
+            "content": row["content"],
+            "reliability": row["reliability"],
+            "published_at": row["published_at"].isoformat() if row["published_at"] else None
+        } for row in source_rows]
+        
+        return {
+            "subject": {"name": subject_name, "slug": subject_slug},
+            "claims": claims_data,
+            "sources": sources_data
+        }
+    
+    def _verify_claim_detailed(self, claim: Dict[str, Any], 
+                               initial_llm_result: Dict[str, Any],
+                               source_analysis: Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]) -> Dict[str, Any]:
+        claim_text = claim.get("claim", "")
+        supporting_sources, detailed_contradictions = source_analysis
         
-        date_consistency = await self._check_date_consistency(claim_date, supporting_sources)
+        date_consistency = self._check_date_consistency(claim.get("claim_day"), supporting_sources)
         
         verification_score = self._calculate_verification_score(
             supporting_sources, date_consistency, claim.get("confidence", 0)
@@ -256,8 +404,6 @@ Return a JSON array of these objects, one for each claim. Ensure the output is v
         contradictions = []
         if initial_llm_result.get("contradiction_found", False):
             contradictions.append({"reasoning": initial_llm_result.get("reasoning", "Contradiction indicated by initial LLM check.")})
-        
-        detailed_contradictions = await self._find_contradictions(claim_text, sources)
         contradictions.extend(detailed_contradictions)
         
         return {
@@ -273,53 +419,112 @@ Return a JSON array of these objects, one for each claim. Ensure the output is v
             "recommendation": self._get_recommendation(verified, flagged, contradictions)
         }
     
-    async def _find_supporting_sources(self, claim_text: str, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        if not sources:
-            return []
-
-        sources_parts = []
-        for i, source in enumerate(sources):
-            content = source.get("content", "")[:1500]
-            if not content:
-                continue
-            sources_parts.append(f"Source {i+1} (ID: {source.get('id')}, Title: {source.get('title', 'Unknown')}, Domain: {source.get('domain', 'Unknown')}):\nContent: {content}\n")
-
-        sources_text = "\n\n".join(sources_parts)
-
-        prompt = f"""Analyze if each source supports the given claim. Be conservative - only say supports if there's clear evidence.
-Claim: \"{claim_text}\"\n
-Sources:
-{sources_text}
+    def _relevant_sources(self, claim_text: str, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Pick the sources most lexically similar to the claim, so only those go to the LLM."""
+        if len(sources) <= self.max_sources_per_claim:
+            return sources
+        # Index once per source list; every claim in a run is checked against the same sources
+        if self._indexed_sources is not sources:
+            self._source_index = LexicalIndex([s["content_excerpt"] for s in sources])
+            self._indexed_sources = sources
+        return [sources[i] for i in self._source_index.top_k(claim_text, self.max_sources_per_claim)]
+
+    async def _analyze_claims_by_source(self, claims: List[Dict[str, Any]],
+                                        sources: List[Dict[str, Any]]) -> Dict[Any, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]]:
+        """Check claims against their shortlisted sources, source first.
+
+        Every source is sent with the claims that shortlisted it, so each source's text is
+        the shared prefix of its calls. Returns claim id -> (supporting sources strongest
+        first, contradictions).
+        """
+        sources_by_id = {s.get("id"): s for s in sources}
+        claims_by_source = defaultdict(list)
+        for claim in claims:
+            claim_text = claim.get("claim") or ""
+            if not claim_text.strip():
+                continue  # Nothing to check; the claim ends up flagged with no support
+            for source in self._relevant_sources(claim_text, sources):
+                if source["content_excerpt"]:
+                    claims_by_source[source.get("id")].append(claim)
+
+        # With a local NLI model, contradictions are scored here and the LLM only judges support
+        nli = get_nli_classifier()
+        nli_pairs = []
+        if nli is not None:
+            nli_pairs = [(sources_by_id[source_id], claim)
+                         for source_id, source_claims in claims_by_source.items() for claim in source_claims]
+            nli_scores = asyncio.ensure_future(self._score_contradictions(nli, nli_pairs))
+        
+        # Most reliable sources first, in a few concurrent rounds. A claim that already has
+        # plenty of support isn't checked for support by later rounds, whose sources would
+        # only rank lower. Later sources may still contradict it, so without NLI scores it
+        # keeps getting a cheaper contradiction-only check; with them, it's already covered.
+        analysis = {str(claim.get("id")): ([], []) for claim in claims}
+        enough_support = self.min_sources_required * 2
+        step = self.claims_per_source_check
+        source_ids = sorted(claims_by_source, key=lambda source_id: sources_by_id[source_id].get("reliability") or 0,
+                            reverse=True)
+        per_round = max(1, -(-len(source_ids) // self.source_check_rounds))
+        for start in range(0, len(source_ids), per_round):
+            chunks = []
+            for source_id in source_ids[start:start + per_round]:
+                source = sources_by_id[source_id]
+                pending, settled = [], []
+                for claim in claims_by_source[source_id]:
+                    needs_support = len(analysis[str(claim.get("id"))][0]) < enough_support
+                    (pending if needs_support else settled).append(claim)
+                chunks.extend((source, pending[i:i + step], True) for i in range(0, len(pending), step))
+                if nli is None:
+                    chunks.extend((source, settled[i:i + step], False) for i in range(0, len(settled), step))
+            # A failed source call only loses that source's verdicts, not the whole run
+            results = await asyncio.gather(*(
+                self._analyze_all_claims_against_source(source, chunk, check_support=check_support,
+                                                        check_contradictions=nli is None)
+                for source, chunk, check_support in chunks
+            ), return_exceptions=True)
+            self._record_source_checks(analysis, chunks, results, record_contradictions=nli is None)
+        
+        nli_scores = await nli_scores if nli is not None else []
 
-For each source, return a JSON object:
-{{
-    "source_id": "ID",
-    "supports": true/false,
-    "strength": 0.0-1.0,
-    "evidence": "exact quote or snippet",
-    "reasoning": "brief explanation"
-}}
+        for (source, claim), score in zip(nli_pairs, nli_scores):
+            if score is not None:
+                analysis[str(claim.get("id"))][1].append({
+                    "source_id": source.get("id"),
+                    "url": source.get("url"),
+                    "title": source.get("title"),
+                    "contradiction_strength": score,
+                    "contradicting_evidence": "",
+                    "reasoning": "NLI model classified the source as contradicting the claim"
+                })
 
-Return a JSON array of these objects, one per source. Ensure valid JSON."""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.call_llm(messages, temperature=0.1)
-
-        support_checks = self._parse_json_from_response(response)
-        if support_checks is None:
-            return []
-
-        supporting_sources = []
-        for check in support_checks:
-            if check.get("supports", False):
-                source = next((s for s in sources if s.get("id") == check.get("source_id")), None)
-                if source:
-                    strength = check.get("strength", 0.5)
+        for supporting_sources, _ in analysis.values():
+            supporting_sources.sort(key=lambda x: (x.get("reliability", 0) * x.get("support_strength", 0)), reverse=True)
+        return analysis
+
+    def _record_source_checks(self, analysis: Dict[str, Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]],
+                              chunks: List[Tuple[Dict[str, Any], List[Dict[str, Any]], bool]], results: List[Any],
+                              record_contradictions: bool = True):
+        """Add per-source LLM verdicts to analysis (claim id -> (supporting, contradictions)).
+
+        Each chunk is (source, claims, check_support); support verdicts are only
+        recorded for chunks that asked for them.
+        """
+        for (source, chunk, check_support), checks in zip(chunks, results):
+            if isinstance(checks, Exception):
+                self.logger.error(f"Error checking {len(chunk)} claims against source {source.get('id')}: {checks}")
+                continue
+            asked = {str(claim.get("id")) for claim in chunk}
+            for check in checks:
+                claim_id = str(check.get("claim_id"))
+                if claim_id not in asked:
+                    continue
+                supporting_sources, contradictions = analysis[claim_id]
+                if check_support and check.get("supports", False):
+                    strength = check.get("support_strength", 0.5)
                     if isinstance(strength, dict):
                         strength = 0.5
-                    
                     supporting_sources.append({
-                        "source_id": check.get("source_id"),
+                        "source_id": source.get("id"),
                         "url": source.get("url"),
                         "domain": source.get("domain"),
                         "title": source.get("title"),
@@ -327,62 +532,92 @@ Return a JSON array of these objects, one per source. Ensure valid JSON."""
                         "support_strength": strength,
                         "evidence_snippet": check.get("evidence", "")
                     })
+                if record_contradictions and check.get("contradicts", False):
+                    contradictions.append({
+                        "source_id": source.get("id"),
+                        "url": source.get("url"),
+                        "title": source.get("title"),
+                        "contradiction_strength": check.get("contradiction_strength", 0.5),
+                        "contradicting_evidence": check.get("contradicting_evidence", ""),
+                        "reasoning": check.get("reasoning", "")
+                    })
 
-        supporting_sources.sort(key=lambda x: (x.get("reliability", 0) * x.get("support_strength", 0)), reverse=True)
-        return supporting_sources
-    
-    async def _check_date_consistency(self, claim_date: str, supporting_sources: List[Dict[str, Any]]) -> Dict[str, Any]:
-        if not claim_date:
-            return {"consistent": True, "note": "No date to verify"}
-
+    async def _score_contradictions(self, nli: Any, pairs: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> List[Any]:
+        """Run the local NLI model over (source, claim) pairs off the event loop; None means no contradiction."""
         try:
-            claim_datetime = datetime.fromisoformat(claim_date)
-        except:
-            return {"consistent": False, "note": "Invalid claim date format"}
-
-        if not supporting_sources:
-            return {"consistent": False, "note": "No supporting sources"}
-
-        evidence_parts = []
-        for i, source in enumerate(supporting_sources):
-            evidence = source.get("evidence_snippet", "")[:1000]
-            if evidence:
-                evidence_parts.append(f"Evidence {i+1} (Source ID: {source.get('source_id')}):\n{evidence}\n")
-
-        evidence_text = "\n\n".join(evidence_parts)
+            return await self.run_cpu_bound(
+                contradiction_scores, nli, [(source["content_excerpt"], claim.get("claim", "")) for source, claim in pairs]
+            )
+        except Exception as e:
+            self.logger.error(f"NLI contradiction scoring failed: {e}", exc_info=True)
+            return [None] * len(pairs)
+
+    async def _analyze_all_claims_against_source(self, source: Dict[str, Any], claims: List[Dict[str, Any]],
+                                                 check_support: bool = True,
+                                                 check_contradictions: bool = True) -> List[Dict[str, Any]]:
+        """Check whether one source supports and/or contradicts each claim, in a single LLM call."""
+        claims_text = "\n".join(
+            f"Claim {i+1} (ID: {claim.get('id')}): \"{claim.get('claim', '')}\""
+            for i, claim in enumerate(claims)
+        )
+        verdicts = []
+        fields = ""
+        if check_support:
+            verdicts.append("supports")
+            fields += """
+    "supports": true/false,
+    "support_strength": 0.0-1.0,
+    "evidence": "exact quote or snippet supporting the claim","""
+        if check_contradictions:
+            verdicts.append("contradicts")
+            fields += """
+    "contradicts": true/false,
+    "contradiction_strength": 0.0-1.0,
+    "contradicting_evidence": "contradicting text","""
+        task = " or ".join(verdicts)
+        # The source and instructions lead the prompt so providers with prefix caching can reuse
+        # them across this source's calls; only the claims list differs
+        prompt = f"""Source (ID: {source.get('id')}, Title: {source.get('title', 'Unknown')}, Domain: {source.get('domain', 'Unknown')}):
+Content: {source['content_excerpt']}
 
-        prompt = f"""Extract all specific dates from each evidence snippet and convert to ISO format (YYYY-MM-DD). Ignore relative terms.
-Evidence snippets:
-{evidence_text}
+Analyze whether the source above {task} each of the claims listed at the end. Be conservative - only say {task} if there's clear evidence.
 
-Return a JSON object where keys are 'Evidence 1', 'Evidence 2', etc., and values are arrays of ISO dates, e.g.:
+For each claim, return a JSON object:
 {{
-    "Evidence 1": ["2023-01-01"],
-    "Evidence 2": []
+    "claim_id": "ID",{fields}
+    "reasoning": "brief explanation"
 }}
-Ensure valid JSON."""
+
+Return a JSON object of the form {{"results": [...]}} holding one of these objects per claim.
+
+Claims:
+{claims_text}"""
 
         messages = [{"role": "user", "content": prompt}]
-        response = await self.call_llm(messages, temperature=0.1)
+        return [c for c in await self.call_llm_json(messages, list) if isinstance(c, dict)]
+    
+    def _check_date_consistency(self, claim_day: Optional[date], supporting_sources: List[Dict[str, Any]]) -> Dict[str, Any]:
+        if not claim_day:
+            return {"consistent": True, "note": "No date to verify"}
 
-        extracted_dates_dict = self._parse_json_from_response(response)
-        if extracted_dates_dict is None:
-            return {"consistent": False, "note": "Date extraction failed"}
+        if not supporting_sources:
+            return {"consistent": False, "note": "No supporting sources"}
+
+        snippets = [s["evidence_snippet"] for s in supporting_sources if s.get("evidence_snippet")]
+        if not snippets:
+            # Same outcome as finding no dates below, without scanning anything
+            return {"consistent": False, "consistency_score": 0, "matches": 0, "conflicts": 0, "note": "No evidence text"}
 
         date_matches = 0
         date_conflicts = 0
 
-        for dates in extracted_dates_dict.values():
-            for date_str in dates:
-                try:
-                    source_date = datetime.fromisoformat(date_str)
-                    days_diff = abs((claim_datetime - source_date).days)
-                    if days_diff <= self.date_tolerance_days:
-                        date_matches += 1
-                    else:
-                        date_conflicts += 1
-                except:
-                    continue
+        for snippet in snippets:
+            # Dates are pulled from the evidence locally as date objects; no LLM call or reparsing
+            for source_day in extract_dates(snippet):
+                if abs((claim_day - source_day).days) <= self.date_tolerance_days:
+                    date_matches += 1
+                else:
+                    date_conflicts += 1
 
         consistency_score = date_matches / max(date_matches + date_conflicts, 1) if (date_matches + date_conflicts) > 0 else 0
         return {
@@ -392,58 +627,6 @@ Ensure valid JSON."""
             "conflicts": date_conflicts
         }
     
-    async def _find_contradictions(self, claim_text: str, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        limited_sources = sources[:10]
-        if not limited_sources:
-            return []
-
-        sources_parts = []
-        for i, source in enumerate(limited_sources):
-            content = source.get("content", "")[:1500]
-            if not content:
-                continue
-            sources_parts.append(f"Source {i+1} (ID: {source.get('id')}, Title: {source.get('title', 'Unknown')}):\nContent: {content}\n")
-
-        sources_text = "\n\n".join(sources_parts)
-
-        prompt = f"""Analyze if each source contradicts the claim. Only say contradicts if there's clear evidence.
-Claim: \"{claim_text}\"\n
-Sources:
-{sources_text}
-
-For each source, return a JSON object:
-{{
-    "source_id": "ID",
-    "contradicts": true/false,
-    "strength": 0.0-1.0,
-    "evidence": "contradicting text",
-    "reasoning": "explanation"
-}}
-
-Return a JSON array of these objects. Ensure valid JSON."""
-        
-        messages = [{"role": "user", "content": prompt}]
-        response = await self.call_llm(messages, temperature=0.1)
-
-        contradiction_checks = self._parse_json_from_response(response)
-        if contradiction_checks is None:
-            return []
-
-        contradictions = []
-        for check in contradiction_checks:
-            if check.get("contradicts", False):
-                source = next((s for s in limited_sources if s.get("id") == check.get("source_id")), {})
-                contradictions.append({
-                    "source_id": check.get("source_id"),
-                    "url": source.get("url"),
-                    "title": source.get("title"),
-                    "contradiction_strength": check.get("strength", 0.5),
-                    "contradicting_evidence": check.get("evidence", ""),
-                    "reasoning": check.get("reasoning", "")
-                })
-
-        return contradictions
-    
     def _calculate_verification_score(self, supporting_sources: List[Dict[str, Any]], 
                                     date_consistency: Dict[str, Any], 
                                     original_confidence: float) -> float:
@@ -475,36 +658,53 @@ Return a JSON array of these objects. Ensure valid JSON."""
         else:
             return "CAUTION - Use with additional context"
     
-    async def _update_claim_verification(self, verification_results: List[Dict[str, Any]]):
-        db = next(get_db())
-        
+    async def _update_claim_verification(self, db: Session, verification_results: List[Dict[str, Any]]):
+        # Like the initial load, the synchronous write runs on a worker thread
+        await asyncio.to_thread(self._write_claim_verification, db, verification_results)
+    
+    def _write_claim_verification(self, db: Session, verification_results: List[Dict[str, Any]]):
         try:
+            # One executemany UPDATE instead of a SELECT and UPDATE per claim
+            mappings = []
             for result in verification_results:
                 claim_id = result.get("claim_id")
                 if claim_id:
-                    claim = db.query(Claim).filter(Claim.id == claim_id).first()
-                    if claim:
-                        claim.confidence = result.get("verification_score", claim.confidence)
-                        claim.corroboration_count = result.get("supporting_sources_count", 0)
+                    mapping = {
+                        "id": uuid.UUID(str(claim_id)),
+                        "corroboration_count": result.get("supporting_sources_count", 0)
+                    }
+                    if "verification_score" in result:
+                        mapping["confidence"] = result["verification_score"]
+                    mappings.append(mapping)
             
+            if mappings:
+                db.execute(update(Claim), mappings)  # ORM bulk UPDATE by primary key
             db.commit()
             
         except Exception as e:
             db.rollback()
             self.logger.error(f"Error updating claim verification: {e}", exc_info=True)
-        finally:
-            db.close()
     
-    def _generate_fact_check_report(self, verification_results: List[Dict[str, Any]]) -> str:
+    @staticmethod
+    def _count_verdicts(verification_results: List[Dict[str, Any]]) -> Tuple[int, int, int]:
+        """Count verified, flagged and contradicted claims in one pass."""
+        verified = flagged = contradicted = 0
+        for v in verification_results:
+            verified += bool(v.get("verified", False))
+            flagged += bool(v.get("flagged", False))
+            contradicted += bool(v.get("contradictions"))
+        return verified, flagged, contradicted
+    
+    def _generate_fact_check_report(self, verification_results: List[Dict[str, Any]],
+                                    verified: int, flagged: int, contradictions: int) -> str:
         total = len(verification_results)
         if total == 0:
             return "# Fact-Check Report\n\nNo claims were processed."
 
-        verified = len([v for v in verification_results if v["verified"]])
-        flagged = len([v for v in verification_results if v["flagged"]])
-        contradictions = len([v for v in verification_results if v["contradictions"]])
+        # Stops scanning once the first ten flagged claims are found
+        flagged_claims = list(islice((v for v in verification_results if v.get("flagged", False)), 10))
         
-        report = f"""# Fact-Check Report
+        parts = [f"""# Fact-Check Report
         
 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 
@@ -515,15 +715,16 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - Claims with contradictions: {contradictions}
 
 ## Recommendations
-"""
+"""]
         
-        flagged_claims = [v for v in verification_results if v["flagged"]]
         if flagged_claims:
-            report += "\n### Claims Requiring Review\n\n"
-            for claim in flagged_claims[:10]:
-                report += f"- **{claim['claim']}**\n"
-                report += f"  - Sources: {claim['supporting_sources_count']}\n"
-                report += f"  - Score: {claim['verification_score']:.2f}\n"
-                report += f"  - Recommendation: {claim['recommendation']}\n\n"
+            parts.append("\n### Claims Requiring Review\n\n")
+            for claim in flagged_claims:
+                parts.append(
+                    f"- **{claim['claim']}**\n"
+                    f"  - Sources: {claim['supporting_sources_count']}\n"
+                    f"  - Score: {claim['verification_score']:.2f}\n"
+                    f"  - Recommendation: {claim['recommendation']}\n\n"
+                )
         
-        return report
+        return "".join(parts)
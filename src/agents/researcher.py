@@ -1,15 +1,43 @@
-from typing import Dict, Any, List
-import json
+from typing import Dict, Any, List, Optional
+import asyncio
 import aiohttp
+from operator import itemgetter
 from src.agents.base import BaseAgent
 from src.config import config
 from src.llm.base_provider import LLMProvider
+from src.utils import fast_json
+
+# Enhanced ranking system prioritizing high-CPM audience sources
+_AUTHORITY_DOMAINS = {
+    # Tier 1: Premium US/Canadian sources (highest authority)
+    "wsj.com": 6, "nytimes.com": 6, "bloomberg.com": 6, "ft.com": 6,
+    "reuters.com": 6, "sec.gov": 6, "harvard.edu": 6, "stanford.edu": 6,
+    
+    # Tier 2: Major business/tech sources
+    "forbes.com": 5, "businessinsider.com": 5, "cnbc.com": 5,
+    "techcrunch.com": 5, "crunchbase.com": 5, "wired.com": 5,
+    
+    # Tier 3: Established media
+    "cnn.com": 4, "bbc.com": 4, "theguardian.com": 4, 
+    "washingtonpost.com": 4, "theatlantic.com": 4, "newyorker.com": 4,
+    
+    # Tier 4: Reference sources
+    "wikipedia.org": 4, "mit.edu": 4,
+    
+    # Lower priority sources
+    "medium.com": 2, "linkedin.com": 2
+}
+
+_ENGAGEMENT_KEYWORDS = ("controversy", "scandal", "failure", "success", "breakthrough",
+                        "behind the scenes", "untold story", "secret", "revealed")
 
 class ResearcherAgent(BaseAgent):
     """Agent for discovering and gathering information sources about a subject, optimized for US/Canadian audiences and YouTube's Gemini algorithm."""
     
     def __init__(self, llm_provider: LLMProvider):
         super().__init__(llm_provider)
+        self.search_concurrency = 5  # Concurrent search API requests, kept under Serper's rate limit
+        self._session: Optional[aiohttp.ClientSession] = None  # Created on first search, closed by aclose()
         # Enhanced search categories optimized for high-CPM audiences and engagement
         self.search_categories = [
             "history and origin story",
@@ -47,11 +75,16 @@ class ResearcherAgent(BaseAgent):
         # Generate search queries
         queries = await self._generate_search_queries(subject_name)
         
-        # Search for sources
-        sources = []
-        for query in queries[:10]:  # Limit initial queries
-            search_results = await self._search_web(query)
-            sources.extend(search_results)
+        # Search for sources; queries run concurrently over the agent's session, in query order
+        session = self._get_session()
+        semaphore = asyncio.Semaphore(self.search_concurrency)
+
+        async def search(query: str) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await self._search_web(session, query)
+
+        search_results = await asyncio.gather(*(search(query) for query in queries[:10]))  # Limit initial queries
+        sources = [source for results in search_results for source in results]
         
         # Rank and filter sources
         ranked_sources = await self._rank_sources(sources, subject_name)
@@ -62,6 +95,23 @@ class ResearcherAgent(BaseAgent):
             "queries_used": queries
         }  
   
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Return the agent's search session, creating it on first use.
+
+        Reusing one pooled session keeps connections to the search API alive and DNS
+        cached across queries and runs instead of paying a new TLS handshake each time.
+        """
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+            self._session = aiohttp.ClientSession(connector=connector, json_serialize=fast_json.dumps)
+        return self._session
+
+    async def aclose(self):
+        """Close the search session and its connection pool, if one was created."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
     async def _generate_search_queries(self, subject_name: str) -> List[str]:
         """Generate targeted search queries optimized for US/Canadian audiences and high-engagement content."""
         categories_str = ", ".join(self.search_categories)
@@ -110,14 +160,14 @@ class ResearcherAgent(BaseAgent):
                 f"{subject_name} career"
             ]
     
-    async def _search_web(self, query: str) -> List[Dict[str, Any]]:
+    async def _search_web(self, session: aiohttp.ClientSession, query: str) -> List[Dict[str, Any]]:
         """Search web using configured search engine"""
         if config.get("engines", {}).get("web_search") == "serper":
-            return await self._search_serper(query)
+            return await self._search_serper(session, query)
         else:
             return []  # Add other search engines as needed
     
-    async def _search_serper(self, query: str) -> List[Dict[str, Any]]:
+    async def _search_serper(self, session: aiohttp.ClientSession, query: str) -> List[Dict[str, Any]]:
         """Search using Serper API"""
         url = "https://google.serper.dev/search"
         headers = {
@@ -131,22 +181,21 @@ class ResearcherAgent(BaseAgent):
         }
         
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.post(url, json=payload, headers=headers) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        results = []
-                        
-                        for item in data.get("organic", []):
-                            results.append({
-                                "url": item.get("link"),
-                                "title": item.get("title"),
-                                "snippet": item.get("snippet"),
-                                "domain": item.get("link", "").split("/")[2] if item.get("link") else "",
-                                "query": query
-                            })
-                        
-                        return results
+            async with session.post(url, json=payload, headers=headers) as response:
+                if response.status == 200:
+                    data = await response.json(loads=fast_json.loads)
+                    results = []
+                    
+                    for item in data.get("organic", []):
+                        results.append({
+                            "url": item.get("link"),
+                            "title": item.get("title"),
+                            "snippet": item.get("snippet"),
+                            "domain": item.get("link", "").split("/")[2] if item.get("link") else "",
+                            "query": query
+                        })
+                    
+                    return results
         except Exception as e:
             print(f"Search error: {e}")
         
@@ -154,53 +203,32 @@ class ResearcherAgent(BaseAgent):
     
     async def _rank_sources(self, sources: List[Dict[str, Any]], subject_name: str) -> List[Dict[str, Any]]:
         """Rank sources by relevance, authority, and US/Canadian audience appeal"""
-        # Enhanced ranking system prioritizing high-CPM audience sources
-        authority_domains = {
-            # Tier 1: Premium US/Canadian sources (highest authority)
-            "wsj.com": 6, "nytimes.com": 6, "bloomberg.com": 6, "ft.com": 6,
-            "reuters.com": 6, "sec.gov": 6, "harvard.edu": 6, "stanford.edu": 6,
-            
-            # Tier 2: Major business/tech sources
-            "forbes.com": 5, "businessinsider.com": 5, "cnbc.com": 5,
-            "techcrunch.com": 5, "crunchbase.com": 5, "wired.com": 5,
-            
-            # Tier 3: Established media
-            "cnn.com": 4, "bbc.com": 4, "theguardian.com": 4, 
-            "washingtonpost.com": 4, "theatlantic.com": 4, "newyorker.com": 4,
-            
-            # Tier 4: Reference sources
-            "wikipedia.org": 4, "mit.edu": 4,
-            
-            # Lower priority sources
-            "medium.com": 2, "linkedin.com": 2
-        }
+        # Lowercased once here rather than for every source
+        subject_lower = subject_name.lower()
+        cultural_keywords = [keyword.lower() for keyword in self.cultural_keywords]
+        preferred_sources = frozenset(self.preferred_sources)
         
         for source in sources:
             domain = source.get("domain", "")
-            source["authority_score"] = authority_domains.get(domain, 1)
+            source["authority_score"] = _AUTHORITY_DOMAINS.get(domain, 1)
+            title_lower = source.get("title", "").lower()
             
             # Boost for subject name in title
-            if subject_name.lower() in source.get("title", "").lower():
+            if subject_lower in title_lower:
                 source["authority_score"] += 1
             
             # Boost for US/Canadian cultural keywords
-            title_snippet = (source.get("title", "") + " " + source.get("snippet", "")).lower()
-            for keyword in self.cultural_keywords:
-                if keyword.lower() in title_snippet:
-                    source["authority_score"] += 0.5
-                    break
+            title_snippet = title_lower + " " + source.get("snippet", "").lower()
+            if any(keyword in title_snippet for keyword in cultural_keywords):
+                source["authority_score"] += 0.5
             
             # Boost for engagement-driving content
-            engagement_keywords = ["controversy", "scandal", "failure", "success", "breakthrough", 
-                                 "behind the scenes", "untold story", "secret", "revealed"]
-            for keyword in engagement_keywords:
-                if keyword in title_snippet:
-                    source["authority_score"] += 0.3
-                    break
+            if any(keyword in title_snippet for keyword in _ENGAGEMENT_KEYWORDS):
+                source["authority_score"] += 0.3
             
             # Prioritize preferred sources
-            if domain in self.preferred_sources:
+            if domain in preferred_sources:
                 source["authority_score"] += 1
         
         # Sort by authority score
-        return sorted(sources, key=lambda x: x.get("authority_score", 0), reverse=True)
\ No newline at end of file
+        return sorted(sources, key=itemgetter("authority_score"), reverse=True)
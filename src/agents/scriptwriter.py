@@ -1,5 +1,5 @@
 from typing import Dict, Any, List, Union, Optional
-import json
+import random
 import re
 from datetime import datetime
 from src.agents.base import BaseAgent
@@ -9,8 +9,14 @@ from sqlalchemy.orm import Session
 import asyncio
 import time
 from src.llm.base_provider import LLMProvider
+from src.utils import fast_json
 from src.documentary_config import DOCUMENTARY_CONFIG, NARRATIVE_STRUCTURES, EMOTIONAL_BEATS
 
+# JSON object or array inside a markdown code fence, with or without a json tag
+_FENCED_JSON_RE = re.compile(r'```(?:json)?\s*([\[{].*?[\]}])\s*```', re.DOTALL)
+_JSON_OBJECT_RE = re.compile(r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})', re.DOTALL)
+_JSON_ARRAY_RE = re.compile(r'(\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\])', re.DOTALL)
+
 class ScriptwriterAgent(BaseAgent):
     """Agent for generating YouTube-ready scripts optimized for Gemini algorithm and US/Canadian audiences"""
     
@@ -208,51 +214,39 @@ class ScriptwriterAgent(BaseAgent):
         # Remove any leading/trailing whitespace
         response = response.strip()
         
-        # Try to extract JSON from markdown code blocks first
-        json_patterns = [
-            r'```json\s*(\{.*?\})\s*```',  # ```json { ... } ```
-            r'```\s*(\{.*?\})\s*```',      # ``` { ... } ```
-            r'```json\s*(\[.*?\])\s*```',  # ```json [ ... ] ```
-            r'```\s*(\[.*?\])\s*```',      # ``` [ ... ] ```
-        ]
-        
-        for pattern in json_patterns:
-            match = re.search(pattern, response, re.DOTALL)
-            if match:
-                try:
-                    return json.loads(match.group(1))
-                except json.JSONDecodeError as e:
-                    self.logger.warning(f"Failed to parse JSON from code block: {e}")
-                    continue
+        # Try to extract JSON from markdown code blocks first, in one scan
+        for match in _FENCED_JSON_RE.finditer(response):
+            try:
+                return fast_json.loads(match.group(1))
+            except fast_json.JSONDecodeError as e:
+                self.logger.warning(f"Failed to parse JSON from code block: {e}")
+                continue
         
         # Try to find JSON objects or arrays directly in the response
-        json_object_pattern = r'(\{[^{}]*(?:\{[^{}]*\}[^{}]*)*\})'
-        json_array_pattern = r'(\[[^\[\]]*(?:\[[^\[\]]*\][^\[\]]*)*\])'
-        
         # Try object pattern first
-        matches = re.findall(json_object_pattern, response, re.DOTALL)
+        matches = _JSON_OBJECT_RE.findall(response)
         for match in matches:
             try:
-                parsed = json.loads(match)
+                parsed = fast_json.loads(match)
                 if isinstance(parsed, dict) and parsed:  # Valid non-empty dict
                     return parsed
-            except json.JSONDecodeError:
+            except fast_json.JSONDecodeError:
                 continue
         
         # Try array pattern
-        matches = re.findall(json_array_pattern, response, re.DOTALL)
+        matches = _JSON_ARRAY_RE.findall(response)
         for match in matches:
             try:
-                parsed = json.loads(match)
+                parsed = fast_json.loads(match)
                 if isinstance(parsed, list) and parsed:  # Valid non-empty list
                     return parsed
-            except json.JSONDecodeError:
+            except fast_json.JSONDecodeError:
                 continue
         
         # Last resort: try parsing the entire response as JSON
         try:
-            return json.loads(response)
-        except json.JSONDecodeError:
+            return fast_json.loads(response)
+        except fast_json.JSONDecodeError:
             self.logger.error(f"Could not extract any valid JSON from response. First 500 chars: {response[:500]}")
             return None
     
@@ -270,7 +264,7 @@ class ScriptwriterAgent(BaseAgent):
             "achievements": research_data['achievements']
         }
         
-        facts_summary = json.dumps(all_facts, indent=2)[:6000]  # More comprehensive data
+        facts_summary = fast_json.dumps(all_facts)[:6000]  # More comprehensive data
         
         prompt = f"""Create a detailed documentary outline for a {target_words}-word YouTube video about {subject_name}.
 
@@ -349,8 +343,8 @@ Make each section compelling with clear emotional arcs, specific hooks, and smoo
             "achievements": research_data['achievements'][:8]
         }
         
-        facts_json = json.dumps(organized_facts, indent=2)[:8000]
-        outline_json = json.dumps(outline, indent=2)[:4000]
+        facts_json = fast_json.dumps(organized_facts)[:8000]
+        outline_json = fast_json.dumps(outline)[:4000]
         
         cultural_refs = ", ".join(self.gemini_optimization["cultural_references"])
         engagement_hooks = ", ".join(self.gemini_optimization["opening_hooks"])
@@ -528,8 +522,6 @@ Write a complete, engaging documentary script that tells the full {subject_name}
         achievements = research_data.get('achievements', [])[:8]
         
         # Create a comprehensive documentary-style script with varied hooks
-        import random
-        
         # Dynamic hook selection based on company type and available data
         hook_options = [
             f"[00:00] In 1993, three engineers in a garage had no idea their graphics card experiment would create a $2 trillion revolution. [PAUSE]\n",
@@ -690,13 +682,13 @@ Write a complete, engaging documentary script that tells the full {subject_name}
         template = self.script_templates.get(style, self.script_templates["storytelling"])
         
         # Prepare relevant facts summary (truncated for token efficiency)
-        all_facts_summary = json.dumps({
+        all_facts_summary = fast_json.dumps({
             "timeline_events": research_data['timeline_events'][:10],
             "founding_info": research_data['founding_info'][:5],
             "business_events": research_data['business_events'][:5],
             "challenges": research_data['challenges'][:5],
             "achievements": research_data['achievements'][:5]
-        }, indent=2)[:4000]  # Truncate to fit tokens
+        })[:4000]  # Truncate to fit tokens
         
         engagement_hooks = ", ".join(self.gemini_optimization["opening_hooks"][:3])
         retention_techniques = ", ".join(self.gemini_optimization["retention_hooks"][:3])
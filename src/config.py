@@ -26,6 +26,30 @@ class Settings(BaseSettings):
 
     # Workflow Orchestration
     prefect_api_url: Optional[str] = os.getenv("PREFECT_API_URL")
+
+    # LLM request concurrency (per agent)
+    llm_concurrency: int = int(os.getenv("LLM_CONCURRENCY", "20"))
+
+    # Optional cheaper model for simple sub-tasks (e.g. entity decomposition); unset uses the provider's model
+    cheap_model: Optional[str] = os.getenv("CHEAP_MODEL")
+
+    # How long Ollama keeps the model loaded after a request, so the shared system prompt stays cached
+    ollama_keep_alive: str = os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+
+    # Per-source token budget for extraction prompts (leaves room for prompt and response)
+    extractor_ctx_tokens: int = int(os.getenv("EXTRACTOR_CTX_TOKENS", "3000"))
+    # Token budget for all documents sent in one extraction call
+    extractor_batch_tokens: int = int(os.getenv("EXTRACTOR_BATCH_TOKENS", "12000"))
+
+    # Sources shortlisted per claim by the fact checker's lexical prefilter before any LLM check
+    fact_check_sources_per_claim: int = int(os.getenv("FACT_CHECK_SOURCES_PER_CLAIM", "10"))
+    # Optional local NLI model (e.g. cross-encoder/nli-deberta-v3-base) for contradiction checks; unset asks the LLM
+    fact_check_nli_model: Optional[str] = os.getenv("FACT_CHECK_NLI_MODEL")
+
+    # LLM response cache
+    llm_cache_enabled: bool = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    llm_cache_path: str = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+    llm_cache_ttl_days: int = int(os.getenv("LLM_CACHE_TTL_DAYS", "30"))
     
     class Config:
         env_file = ".env"
@@ -19,11 +19,11 @@ class WebCrawler:
             # Rate limiting per domain
             domain = urlparse(url).netloc
             if domain in self.last_request_time:
-                elapsed = time.time() - self.last_request_time[domain]
+                elapsed = time.monotonic() - self.last_request_time[domain]
                 if elapsed < self.delay:
                     await asyncio.sleep(self.delay - elapsed)
             
-            self.last_request_time[domain] = time.time()
+            self.last_request_time[domain] = time.monotonic()
             
             async with self.session.get(url) as response:
                 if response.status == 200:
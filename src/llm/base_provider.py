@@ -1,17 +1,20 @@
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
     @abstractmethod
-    async def call_llm(self, messages: List[Dict[str, str]], temperature: float) -> str:
+    async def call_llm(self, messages: List[Dict[str, str]], temperature: float, model: Optional[str] = None,
+                       json_mode: bool = False) -> str:
         """
         Call the LLM with the given messages and temperature.
 
         Args:
             messages: A list of messages to send to the LLM.
             temperature: The temperature to use for the LLM call.
+            model: Optional model name overriding the provider's default for this call.
+            json_mode: Ask the provider to constrain output to a single JSON object.
 
         Returns:
             The response from the LLM.
@@ -0,0 +1,107 @@
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+from src.config import settings
+from src.utils import fast_json
+
+class LLMCache:
+    """LLM response cache keyed by a SHA256 of the request.
+
+    A small in-process LRU sits in front of the persistent SQLite store, so repeats
+    within a run are answered without a thread hop or disk read.
+    """
+
+    def __init__(self, db_path: str, ttl_days: float = 30, memory_entries: int = 1024):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_days * 24 * 60 * 60
+        self.memory_entries = memory_entries
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(model: str, temperature: float, messages: List[Dict[str, Any]], json_mode: bool = False) -> str:
+        """Build a deterministic cache key for an LLM request."""
+        request = {"m": model, "t": temperature, "msgs": messages}
+        if json_mode:
+            request["j"] = True  # Only added when set, so existing keys stay valid
+        payload = fast_json.dumps(request, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS cache(key TEXT PRIMARY KEY, response TEXT, ts INTEGER)")
+            self._conn.commit()
+        return self._conn
+
+    def _get(self, key: str) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            row = self._connect().execute("SELECT response, ts FROM cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        response, ts = row
+        if time.time() - ts > self.ttl_seconds:
+            return None
+        return response, ts
+
+    def _put(self, key: str, response: str):
+        with self._lock:
+            conn = self._connect()
+            conn.execute("INSERT OR REPLACE INTO cache(key, response, ts) VALUES (?, ?, ?)",
+                         (key, response, int(time.time())))
+            conn.commit()
+
+    def _remember(self, key: str, response: str, ts: float):
+        self._memory[key] = (response, ts)
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[str]:
+        """Return the cached response for key, or None on a miss or expired entry."""
+        entry = self._memory.get(key)
+        if entry is not None:
+            response, ts = entry
+            if time.time() - ts <= self.ttl_seconds:
+                self._memory.move_to_end(key)
+                return response
+            del self._memory[key]
+
+        row = await asyncio.to_thread(self._get, key)
+        if row is None:
+            return None
+        # Keep the stored timestamp so the in-memory copy expires when the row does
+        response, ts = row
+        self._remember(key, response, ts)
+        return response
+
+    async def put(self, key: str, response: str):
+        """Store a response, replacing any previous entry for key."""
+        self._remember(key, response, time.time())
+        await asyncio.to_thread(self._put, key, response)
+
+    def clear(self):
+        """Remove all cached responses."""
+        self._memory.clear()
+        with self._lock:
+            conn = self._connect()
+            conn.execute("DELETE FROM cache")
+            conn.commit()
+
+_cache: Optional[LLMCache] = None
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None if caching is disabled."""
+    global _cache
+    if not settings.llm_cache_enabled:
+        return None
+    if _cache is None:
+        _cache = LLMCache(settings.llm_cache_path, ttl_days=settings.llm_cache_ttl_days)
+    return _cache
@@ -1,8 +1,9 @@
 
 import aiohttp
-import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from src.config import settings
 from src.llm.base_provider import LLMProvider
+from src.utils import fast_json
 
 class OllamaProvider(LLMProvider):
     """Provider for interacting with the Ollama API."""
@@ -11,13 +12,16 @@ class OllamaProvider(LLMProvider):
         self.model = model
         self.host = host
 
-    async def call_llm(self, messages: List[Dict[str, str]], temperature: float) -> str:
+    async def call_llm(self, messages: List[Dict[str, str]], temperature: float, model: Optional[str] = None,
+                       json_mode: bool = False) -> str:
         """
         Call the Ollama API with the given messages and temperature.
 
         Args:
             messages: A list of messages to send to the LLM.
             temperature: The temperature to use for the LLM call.
+            model: Optional model name overriding self.model for this call.
+            json_mode: Constrain the output to valid JSON via Ollama's format option.
 
         Returns:
             The response from the LLM.
@@ -26,20 +30,24 @@ class OllamaProvider(LLMProvider):
         api_url = f"{self.host}/api/generate"
         
         payload = {
-            "model": self.model,
+            "model": model or self.model,
             "prompt": prompt,
             "stream": False,
+            # Keep the model (and its cached prompt prefix) loaded between extraction batches
+            "keep_alive": settings.ollama_keep_alive,
             "options": {
                 "temperature": temperature
             }
         }
+        if json_mode:
+            payload["format"] = "json"
 
         try:
             timeout = aiohttp.ClientTimeout(total=600)  # 10-minute timeout
-            async with aiohttp.ClientSession(timeout=timeout) as session:
+            async with aiohttp.ClientSession(timeout=timeout, json_serialize=fast_json.dumps) as session:
                 async with session.post(api_url, json=payload) as response:
                     response.raise_for_status()
-                    response_json = await response.json()
+                    response_json = await response.json(loads=fast_json.loads)
                     return response_json.get("response", "")
         except aiohttp.ClientError as e:
             print(f"Error calling Ollama API: {e}")
@@ -1,38 +1,56 @@
-from typing import List, Dict, Any
-import httpx
-from openai import AsyncOpenAI, RateLimitError
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
-from src.config import settings
+from typing import List, Dict, Any, Optional
+from openai import RateLimitError, APIConnectionError, APITimeoutError, InternalServerError
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception_type
 from src.llm.base_provider import LLMProvider
+from src.llm.openai_singleton import get_openai_client
+
+# Transient failures worth retrying; APITimeoutError subclasses APIConnectionError,
+# which is what the client raises for httpx connect/read errors
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, APITimeoutError, InternalServerError)
+
+_jittered_backoff = wait_random_exponential(multiplier=1, max=30)
+
+def _wait_retry_after_or_backoff(retry_state) -> float:
+    """Honor the server's Retry-After on 429s, otherwise back off with full jitter."""
+    exc = retry_state.outcome.exception()
+    if isinstance(exc, RateLimitError):
+        try:
+            return min(float(exc.response.headers.get("retry-after", "")), 60.0)
+        except (TypeError, ValueError):
+            pass
+    return _jittered_backoff(retry_state)
 
 class OpenAIProvider(LLMProvider):
     """OpenAI LLM provider."""
 
     def __init__(self, model: str = "gpt-4o-mini"):
         self.model = model
-        http_client = httpx.AsyncClient()
-        self.client = AsyncOpenAI(
-            api_key=settings.openai_api_key,
-            http_client=http_client
-        )
+
+    @property
+    def client(self):
+        """The shared client, looked up per call so a closed singleton is replaced rather than reused."""
+        return get_openai_client()
 
     @retry(
-        wait=wait_exponential(multiplier=1, min=4, max=20),
-        stop=stop_after_attempt(5),
-        retry=retry_if_exception_type(RateLimitError),
-        before_sleep=lambda retry_state: print(f"Rate limit hit. Retrying in {retry_state.next_action.sleep:.2f} seconds...")
+        wait=_wait_retry_after_or_backoff,
+        stop=stop_after_attempt(6),
+        retry=retry_if_exception_type(_RETRYABLE_ERRORS),
+        before_sleep=lambda retry_state: print(f"Transient LLM error ({type(retry_state.outcome.exception()).__name__}). Retrying in {retry_state.next_action.sleep:.2f} seconds...")
     )
-    async def call_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7) -> str:
-        """Make LLM API call with exponential backoff for rate limits."""
+    async def call_llm(self, messages: List[Dict[str, str]], temperature: float = 0.7, model: Optional[str] = None,
+                       json_mode: bool = False) -> str:
+        """Make LLM API call, retrying rate limits and transient connection/server errors."""
+        extra = {"response_format": {"type": "json_object"}} if json_mode else {}
         try:
             response = await self.client.chat.completions.create(
-                model=self.model,
+                model=model or self.model,
                 messages=messages,
-                temperature=temperature
+                temperature=temperature,
+                **extra
             )
             return response.choices[0].message.content
-        except RateLimitError as e:
-            print(f"Rate limit error after multiple retries: {e}")
+        except _RETRYABLE_ERRORS as e:
+            print(f"Transient LLM API error: {e}")
             raise  # Re-raise the exception to be caught by tenacity
         except Exception as e:
             print(f"An unexpected LLM API error occurred: {e}")
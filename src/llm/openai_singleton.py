@@ -0,0 +1,29 @@
+from typing import Optional
+import httpx
+from openai import AsyncOpenAI
+from src.config import settings
+
+_client: Optional[AsyncOpenAI] = None
+
+def get_openai_client() -> AsyncOpenAI:
+    """Return the process-wide AsyncOpenAI client, creating it on first use.
+
+    All providers share one httpx connection pool so TLS handshakes are paid once
+    per process rather than once per agent, and HTTP/2 lets concurrent requests
+    multiplex over a single connection.
+    """
+    global _client
+    if _client is None:
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30)
+        )
+        _client = AsyncOpenAI(api_key=settings.openai_api_key, http_client=http_client)
+    return _client
+
+async def close_openai_client():
+    """Close the shared client and its connection pool, if one was created."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -1,18 +1,20 @@
 import asyncio
 import aiohttp
-from typing import Dict, Any, List
+import csv
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 import json
 from datetime import datetime
 from src.agents.researcher import ResearcherAgent
 from src.agents.extractor import ExtractorAgent
 from src.agents.scriptwriter import ScriptwriterAgent
-from src.agents.fact_checker import FactCheckerAgent
+from src.agents.fact_checker import FactCheckerAgent, invalidate_subject_claims
 from src.agents.voiceover_agent import VoiceoverAgent
 from src.crawlers.web_crawler import WebCrawler
 from src.media.pipeline import MediaPipeline
 from src.media.news_media_collector import NewsMediaCollector
 from src.database import get_db
+from src.llm.openai_singleton import close_openai_client
 from src.models import Subject, Source, Claim
 from sqlalchemy.orm import Session
 
@@ -69,14 +71,16 @@ class ResearchPipeline:
                 })
                 results["pipeline_steps"]["discovery"] = discovery_results
                 
-                # Step 2: Crawling
+                # Steps 2-3: Crawling and extraction, overlapped so each source is
+                # extracted as soon as it has been crawled
                 print("Step 2: Crawling sources...")
-                crawl_results = await self._crawl_sources(discovery_results["sources"])
-                results["pipeline_steps"]["crawling"] = crawl_results
-                
-                # Step 3: Extraction
                 print("Step 3: Extracting facts...")
-                extraction_results = await self._extract_facts(crawl_results, subject_name)
+                crawled_queue = asyncio.Queue()
+                crawl_results, extraction_results = await asyncio.gather(
+                    self._crawl_sources(discovery_results["sources"], sink=crawled_queue),
+                    self._extract_facts(crawled_queue, subject_name)
+                )
+                results["pipeline_steps"]["crawling"] = crawl_results
                 results["pipeline_steps"]["extraction"] = extraction_results
                 
                 # Step 4: Save to database
@@ -169,10 +173,19 @@ class ResearchPipeline:
             except Exception as e:
                 print(f"Pipeline error: {e}")
                 results["error"] = str(e)
-                return results   
+                return results
+            
+            finally:
+                await self.researcher.aclose()
+                await close_openai_client()
  
-    async def _crawl_sources(self, sources: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Crawl discovered sources to get content"""
+    async def _crawl_sources(self, sources: List[Dict[str, Any]],
+                             sink: Optional[asyncio.Queue] = None) -> List[Dict[str, Any]]:
+        """Crawl discovered sources to get content.
+
+        If a sink queue is given, each source is also put on it as soon as it has been
+        crawled, followed by a None sentinel once all crawling has finished.
+        """
         crawled_sources = []
         
         # Limit concurrent crawling
@@ -186,31 +199,34 @@ class ResearchPipeline:
                         source["content"] = content
                         source["crawled_at"] = datetime.utcnow().isoformat()
                         crawled_sources.append(source)
+                        if sink is not None:
+                            sink.put_nowait(source)
                         print(f"✅ Crawled: {source['title'][:50]}...")
                 except Exception as e:
                     print(f"❌ Failed to crawl {source['url']}: {e}")
         
         # Crawl sources concurrently
-        tasks = [crawl_single(source) for source in sources[:15]]  # Limit to 15 sources
-        await asyncio.gather(*tasks, return_exceptions=True)
+        try:
+            tasks = [crawl_single(source) for source in sources[:15]]  # Limit to 15 sources
+            await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            # Always end the stream, otherwise a failed crawl leaves the consumer waiting forever
+            if sink is not None:
+                sink.put_nowait(None)
         
         return crawled_sources
     
-    async def _extract_facts(self, crawled_sources: List[Dict[str, Any]], subject_name: str) -> List[Dict[str, Any]]:
-        """Extracts facts from crawled content by batching sources to reduce API calls."""
-        all_claims = []
-        batch_size = 1  # Process 1 article at a time to reduce memory usage
+    async def _extract_facts(self, crawled_sources: asyncio.Queue, subject_name: str) -> List[Dict[str, Any]]:
+        """Extracts facts from crawled sources as they arrive, one article per batch to reduce memory usage."""
+        tasks = []
 
-        # Create batches of sources
-        source_batches = [crawled_sources[i:i + batch_size] for i in range(0, len(crawled_sources), batch_size)]
-
-        for i, batch in enumerate(source_batches):
-            print(f"Processing extraction batch {i+1}/{len(source_batches)}...")
+        async def extract_batch(i, batch):
+            print(f"Processing extraction batch {i+1}...")
             try:
                 # Filter out sources with no content before sending to the agent
                 valid_sources = [s for s in batch if s.get("content")]
                 if not valid_sources:
-                    continue
+                    return []
 
                 extraction_result = await self.extractor.process({
                     "sources": valid_sources,
@@ -228,12 +244,19 @@ class ResearchPipeline:
                         claim["source_title"] = source_map[source_url].get("title", "")
                         claim["source_domain"] = source_map[source_url].get("domain", "")
                 
-                all_claims.extend(claims)
+                return claims
 
             except Exception as e:
                 print(f"❌ Failed to process extraction batch {i+1}: {e}")
-        
-        return all_claims
+                return []
+
+        # Start extracting each source as soon as the crawler hands it over; None marks the end.
+        # The extractor's semaphore and rate limiter bound the outbound LLM requests.
+        while (source := await crawled_sources.get()) is not None:
+            tasks.append(asyncio.create_task(extract_batch(len(tasks), [source])))
+
+        batch_results = await asyncio.gather(*tasks)
+        return [claim for claims in batch_results for claim in claims]
     
     async def _save_to_database(self, subject_name: str, subject_slug: str, 
                                crawled_sources: List[Dict[str, Any]], 
@@ -277,6 +300,7 @@ class ResearchPipeline:
                 db.add(claim)
             
             db.commit()
+            invalidate_subject_claims(subject_slug)
             print(f"✅ Saved {len(crawled_sources)} sources and {len(claims_to_save)} claims to database")
             
         except Exception as e:
@@ -349,8 +373,6 @@ class ResearchPipeline:
 
     def _generate_resolve_markers(self, shot_list: List[Dict[str, Any]], output_dir: Path):
         """Generates a CSV file with markers for DaVinci Resolve."""
-        import csv
-
         def to_timecode(seconds: float, fps: int = 30) -> str:
             """Converts seconds to HH:MM:SS:FF timecode format."""
             ss = int(seconds)
@@ -414,7 +436,6 @@ class ResearchPipeline:
             # Save B-roll suggestions as CSV
             broll_suggestions = script_data.get("broll_suggestions", [])
             if broll_suggestions:
-                import csv
                 with open(output_dir / "shot_list.csv", "w", newline="") as f:
                     writer = csv.DictWriter(f, fieldnames=["timestamp", "duration", "description", "visual_type", "keywords", "mood"])
                     writer.writeheader()
@@ -438,7 +459,6 @@ class ResearchPipeline:
         media_index = media_collection_results.get("media_index")
 
         if timeline_csv_path and media_index:
-            import csv
             with open(timeline_csv_path, "r") as f:
                 timeline_data = list(csv.DictReader(f))
             
@@ -0,0 +1,42 @@
+import re
+from datetime import date
+from typing import List
+
+_MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+MONTH_NAME = r"(Jan(?:uary)?|Feb(?:ruary)?|Mar(?:ch)?|Apr(?:il)?|May|June?|July?|Aug(?:ust)?|Sep(?:t(?:ember)?)?|Oct(?:ober)?|Nov(?:ember)?|Dec(?:ember)?)\.?"
+
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})\b")
+US_DATE_RE = re.compile(r"\b(\d{1,2})/(\d{1,2})/(\d{4})\b")  # Month first, as dateutil assumes
+MONTH_DAY_YEAR_RE = re.compile(rf"\b{MONTH_NAME}\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b", re.IGNORECASE)
+DAY_MONTH_YEAR_RE = re.compile(rf"\b(\d{{1,2}})(?:st|nd|rd|th)?\s+(?:of\s+)?{MONTH_NAME},?\s+(\d{{4}})\b", re.IGNORECASE)
+
+def month_number(name: str) -> int:
+    """Month number for an English month name or abbreviation."""
+    return _MONTHS[name[:3].lower()]
+
+# (pattern, match -> (year, month, day)) pairs for the full dates we recognise
+DATE_PATTERNS = (
+    (ISO_DATE_RE, lambda m: (int(m.group(1)), int(m.group(2)), int(m.group(3)))),
+    (US_DATE_RE, lambda m: (int(m.group(3)), int(m.group(1)), int(m.group(2)))),
+    (MONTH_DAY_YEAR_RE, lambda m: (int(m.group(3)), month_number(m.group(1)), int(m.group(2)))),
+    (DAY_MONTH_YEAR_RE, lambda m: (int(m.group(3)), month_number(m.group(2)), int(m.group(1)))),
+)
+
+def extract_dates(text: str) -> List[date]:
+    """Find specific calendar dates in text, in order of appearance, without duplicates.
+
+    Only complete dates are returned; bare years, month-year and relative terms are ignored.
+    """
+    if not text:
+        return []
+    found = {}
+    for pattern, to_ymd in DATE_PATTERNS:
+        for match in pattern.finditer(text):
+            try:
+                found.setdefault(match.start(), date(*to_ymd(match)))
+            except ValueError:
+                continue  # e.g. 2019-02-30
+    return list(dict.fromkeys(found[pos] for pos in sorted(found)))
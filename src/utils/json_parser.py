@@ -1,7 +1,16 @@
-import json
+from src.utils import fast_json
 import re
 from typing import Any, Optional, List, Dict
 
+# Markdown code blocks (tagged or not) and inline code, tried in this order
+_CODE_BLOCK_RES = (
+    re.compile(r'```json\s*\n?(.*?)\n?```', re.DOTALL | re.IGNORECASE),
+    re.compile(r'```\s*\n?(.*?)\n?```', re.DOTALL | re.IGNORECASE),
+    re.compile(r'`([^`]+)`', re.DOTALL | re.IGNORECASE),
+)
+_ARRAY_RE = re.compile(r'\[.*\]', re.DOTALL)
+_OBJECT_RE = re.compile(r'\{.*\}', re.DOTALL)
+
 def extract_json_from_response(response: str) -> Optional[Any]:
     """
     Robust JSON extraction from LLM responses that may contain extra text.
@@ -15,41 +24,33 @@ def extract_json_from_response(response: str) -> Optional[Any]:
     
     # Try direct JSON parsing first
     try:
-        return json.loads(cleaned)
-    except json.JSONDecodeError:
+        return fast_json.loads(cleaned)
+    except fast_json.JSONDecodeError:
         pass
     
     # Look for JSON in markdown code blocks
-    code_block_patterns = [
-        r'```json\s*\n?(.*?)\n?```',
-        r'```\s*\n?(.*?)\n?```',
-        r'`([^`]+)`'
-    ]
-    
-    for pattern in code_block_patterns:
-        matches = re.findall(pattern, cleaned, re.DOTALL | re.IGNORECASE)
+    for pattern in _CODE_BLOCK_RES:
+        matches = pattern.findall(cleaned)
         for match in matches:
             try:
-                return json.loads(match.strip())
-            except json.JSONDecodeError:
+                return fast_json.loads(match.strip())
+            except fast_json.JSONDecodeError:
                 continue
     
     # Look for JSON array patterns
-    array_pattern = r'\[.*\]'
-    array_matches = re.findall(array_pattern, cleaned, re.DOTALL)
+    array_matches = _ARRAY_RE.findall(cleaned)
     for match in array_matches:
         try:
-            return json.loads(match)
-        except json.JSONDecodeError:
+            return fast_json.loads(match)
+        except fast_json.JSONDecodeError:
             continue
     
     # Look for JSON object patterns
-    object_pattern = r'\{.*\}'
-    object_matches = re.findall(object_pattern, cleaned, re.DOTALL)
+    object_matches = _OBJECT_RE.findall(cleaned)
     for match in object_matches:
         try:
-            return json.loads(match)
-        except json.JSONDecodeError:
+            return fast_json.loads(match)
+        except fast_json.JSONDecodeError:
             continue
     
     # Try to extract JSON from the middle of text
@@ -64,8 +65,8 @@ def extract_json_from_response(response: str) -> Optional[Any]:
         if start_idx != -1 and end_idx != -1 and end_idx > start_idx:
             potential_json = cleaned[start_idx:end_idx + 1]
             try:
-                return json.loads(potential_json)
-            except json.JSONDecodeError:
+                return fast_json.loads(potential_json)
+            except fast_json.JSONDecodeError:
                 continue
     
     return None
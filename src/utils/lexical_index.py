@@ -0,0 +1,45 @@
+import heapq
+import math
+import re
+from collections import Counter, defaultdict
+from typing import List
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "the and or of to in on for with by at from as is was were be been are that this it its into than then has had have".split()
+)
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens, minus single characters and common stopwords."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if len(t) > 1 and t not in _STOPWORDS]
+
+class LexicalIndex:
+    """TF-IDF inverted index for cheaply ranking documents against a short query.
+
+    Documents are scored by the dot product of sublinear TF-IDF weights, with document
+    vectors L2-normalised, so ranking matches cosine similarity.
+    """
+
+    def __init__(self, documents: List[str]):
+        term_counts = [Counter(tokenize(doc)) for doc in documents]
+        doc_freq = Counter(term for counts in term_counts for term in counts)
+        total = len(documents)
+        self.idf = {term: math.log((1 + total) / (1 + df)) + 1 for term, df in doc_freq.items()}
+        self.postings = defaultdict(list)
+        for doc_id, counts in enumerate(term_counts):
+            weights = {term: (1 + math.log(count)) * self.idf[term] for term, count in counts.items()}
+            norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+            for term, weight in weights.items():
+                self.postings[term].append((doc_id, weight / norm))
+
+    def top_k(self, query: str, k: int) -> List[int]:
+        """Indices of the k best-matching documents, best first; documents sharing no terms are skipped."""
+        scores = defaultdict(float)
+        for term, count in Counter(tokenize(query)).items():
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            query_weight = (1 + math.log(count)) * idf
+            for doc_id, weight in self.postings[term]:
+                scores[doc_id] += query_weight * weight
+        return heapq.nlargest(k, scores, key=scores.__getitem__)
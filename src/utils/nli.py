@@ -0,0 +1,36 @@
+import logging
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+from src.config import settings
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def get_nli_classifier() -> Optional[Any]:
+    """Load the local NLI model named by FACT_CHECK_NLI_MODEL once, on first use.
+
+    Returns None when no model is configured or transformers can't load it, in which
+    case callers keep asking the LLM about contradictions.
+    """
+    if not settings.fact_check_nli_model:
+        return None
+    try:
+        from transformers import pipeline
+        return pipeline("text-classification", model=settings.fact_check_nli_model)
+    except Exception as e:
+        logger.warning(f"Could not load NLI model {settings.fact_check_nli_model}, using the LLM for contradictions: {e}")
+        return None
+
+def contradiction_scores(classifier: Any, pairs: List[Tuple[str, str]], batch_size: int = 32) -> List[Optional[float]]:
+    """Score (premise, hypothesis) pairs; the contradiction probability where that is the top label, else None."""
+    if not pairs:
+        return []
+    outputs = classifier(
+        [{"text": premise, "text_pair": hypothesis} for premise, hypothesis in pairs],
+        batch_size=batch_size, truncation=True, top_k=None
+    )
+    scores = []
+    for labels in outputs:
+        top = max(labels, key=lambda label: label["score"])
+        scores.append(top["score"] if top["label"].lower() == "contradiction" else None)
+    return scores
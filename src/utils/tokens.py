@@ -0,0 +1,54 @@
+import logging
+from functools import lru_cache
+from typing import Optional, Tuple
+import tiktoken
+
+def estimate_tokens(text: str) -> int:
+    """Simple token estimation (roughly 4 chars per token for English)."""
+    return len(text) // 4
+
+@lru_cache(maxsize=None)
+def _get_encoding() -> Optional["tiktoken.Encoding"]:
+    """Load the tokenizer once, on first use.
+
+    tiktoken downloads its BPE file the first time; when that isn't possible
+    (e.g. offline with a local Ollama model) fall back to the character heuristic.
+    """
+    try:
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logging.getLogger(__name__).warning(f"Could not load tiktoken encoding, estimating tokens from length: {e}")
+        return None
+
+def count_tokens(text: str) -> int:
+    """Count tokens with the shared tokenizer, or estimate them if it isn't available."""
+    encoding = _get_encoding()
+    if encoding is None:
+        return estimate_tokens(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_with_count(text: str, max_tokens: int) -> Tuple[str, int]:
+    """Truncate text to at most max_tokens tokens, returning the text and its token count.
+
+    Truncated text is trimmed back to a sentence boundary when one is close to the end.
+    """
+    encoding = _get_encoding()
+    if encoding is None:
+        if estimate_tokens(text) <= max_tokens:
+            return text, estimate_tokens(text)
+        truncated = text[:max_tokens * 4]
+    else:
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text, len(tokens)
+        truncated = encoding.decode(tokens[:max_tokens])
+
+    # Trim back to the last complete sentence if it's close to the end
+    boundary = max(truncated.rfind('. '), truncated.rfind('\n'))
+    if boundary > len(truncated) * 0.8:
+        truncated = truncated[:boundary + 1]
+    return truncated, count_tokens(truncated)
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Truncate text to at most max_tokens tokens, preferring to end on a sentence boundary."""
+    return truncate_with_count(text, max_tokens)[0]
@@ -0,0 +1,4 @@
+import os
+
+# Settings are read at import time; unit tests don't need Postgres
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,103 @@
+import unittest
+from unittest import mock
+from src.agents import base
+from src.agents.base import BaseAgent
+
+class ScriptedProvider:
+    """Returns the given replies in order and records the messages of each call."""
+
+    model = "fake"
+
+    def __init__(self, *replies):
+        self.replies = list(replies)
+        self.calls = []
+
+    async def call_llm(self, messages, temperature=0.7, model=None, json_mode=False):
+        self.calls.append(messages)
+        return self.replies.pop(0)
+
+class JsonAgent(BaseAgent):
+    async def process(self, input_data):
+        return {}
+
+MESSAGES = [{"role": "user", "content": 'Return {"results": [...]}'}]
+
+class CallLlmJsonTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # Replies are scripted per test; a shared response cache would replay earlier ones
+        patcher = mock.patch.object(base, "get_llm_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_valid_reply_is_not_retried(self):
+        provider = ScriptedProvider('{"results": [{"claim_id": "1"}]}')
+        result = await JsonAgent(provider).call_llm_json(MESSAGES, list)
+        self.assertEqual(result, [{"claim_id": "1"}])
+        self.assertEqual(len(provider.calls), 1)
+
+    async def test_invalid_json_is_repaired_once(self):
+        provider = ScriptedProvider("Sure! Here are the results", '{"results": [{"claim_id": "1"}]}')
+        result = await JsonAgent(provider).call_llm_json(MESSAGES, list)
+        self.assertEqual(result, [{"claim_id": "1"}])
+        repair = provider.calls[1]
+        self.assertEqual(repair[:-2], MESSAGES)
+        self.assertEqual(repair[-2], {"role": "assistant", "content": "Sure! Here are the results"})
+        self.assertIn("not valid JSON", repair[-1]["content"])
+
+    async def test_wrong_shape_is_repaired(self):
+        # A single-claim batch answered with a bare object instead of {"results": [...]}
+        provider = ScriptedProvider('{"claim_id": "1", "status": "SUPPORTED"}',
+                                    '{"results": [{"claim_id": "1", "status": "SUPPORTED"}]}')
+        result = await JsonAgent(provider).call_llm_json(MESSAGES, list)
+        self.assertEqual(result, [{"claim_id": "1", "status": "SUPPORTED"}])
+        self.assertIn("did not match the requested JSON format", provider.calls[1][-1]["content"])
+
+    async def test_bracketed_prose_before_the_json_is_skipped(self):
+        provider = ScriptedProvider('[see note] {"results":[{"claim_id":"1"}]}')
+        result = await JsonAgent(provider).call_llm_json(MESSAGES, list)
+        self.assertEqual(result, [{"claim_id": "1"}])
+        self.assertEqual(len(provider.calls), 1)
+
+    async def test_several_json_objects_are_repaired(self):
+        for reply in ('{"results": [{"claim_id": "1"}]} {"results": [{"claim_id": "2"}]}',
+                      'Note: {"status": "done"} Answer: {"results": [{"claim_id": "1"}]}'):
+            with self.subTest(reply=reply):
+                provider = ScriptedProvider(reply, '{"results": [{"claim_id": "1"}]}')
+                result = await JsonAgent(provider).call_llm_json(MESSAGES, list)
+                self.assertEqual(result, [{"claim_id": "1"}])
+                self.assertIn("did not match the requested JSON format", provider.calls[1][-1]["content"])
+
+    async def test_gives_up_after_retries(self):
+        provider = ScriptedProvider("not json", "still not json")
+        self.assertEqual(await JsonAgent(provider).call_llm_json(MESSAGES, list), [])
+        self.assertEqual(len(provider.calls), 2)
+
+    async def test_empty_reply_is_not_retried(self):
+        # Providers return "" on failure; asking again to "correct" it wouldn't help
+        provider = ScriptedProvider("")
+        self.assertEqual(await JsonAgent(provider).call_llm_json(MESSAGES, dict), {})
+        self.assertEqual(len(provider.calls), 1)
+
+class ParseJsonFromResponseTest(unittest.TestCase):
+    def setUp(self):
+        self.agent = JsonAgent(ScriptedProvider())
+
+    def test_cut_off_array_keeps_the_finished_items(self):
+        # A reply truncated at the token limit
+        response = '[{"claim":"a"},{"claim":"b"},{"claim":"c"'
+        self.assertEqual(self.agent._parse_json_from_response(response, list), [{"claim": "a"}, {"claim": "b"}])
+
+    def test_cut_off_wrapped_array_keeps_the_finished_items(self):
+        response = '{"claims": [{"claim": "a", "tags": ["x"]}, {"claim": "b", "tags": ["y"'
+        self.assertEqual(self.agent._parse_json_from_response(response, list), [{"claim": "a", "tags": ["x"]}])
+
+    def test_array_after_bracketed_prose(self):
+        response = 'Results [draft]: [{"claim": "a"}] [end]'
+        self.assertEqual(self.agent._parse_json_from_response(response), [{"claim": "a"}])
+
+    def test_array_holding_one_wrapper_is_unwrapped(self):
+        response = '[{"results": [{"claim_id": "1"}]}]'
+        self.assertEqual(self.agent._parse_json_from_response(response, list), [{"claim_id": "1"}])
+
+if __name__ == "__main__":
+    unittest.main()
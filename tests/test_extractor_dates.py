@@ -0,0 +1,49 @@
+import unittest
+from src.agents.extractor import _parse_date
+
+class ParseDateTest(unittest.TestCase):
+    def assertParses(self, cases):
+        for raw, expected in cases:
+            with self.subTest(raw=raw):
+                self.assertEqual(_parse_date(raw), expected)
+
+    def test_full_dates(self):
+        self.assertParses([
+            ("2019-03-05", "2019-03-05"),
+            ("March 5, 2019", "2019-03-05"),
+            ("5 March 2019", "2019-03-05"),
+            ("the 5th of March 2019", "2019-03-05"),
+            ("3/5/2019", "2019-03-05"),
+            ("2019/03/05", "2019-03-05"),
+        ])
+
+    def test_month_and_year(self):
+        self.assertParses([
+            ("Mar 2019", "2019-03-01"),
+            ("sometime in May 2001", "2001-05-01"),
+            ("2019-03-00", "2019-03-01"),
+        ])
+
+    def test_periods_without_a_month_keep_only_the_year(self):
+        self.assertParses([
+            ("Q3 2019", "2019-01-01"),
+            ("3rd quarter 2019", "2019-01-01"),
+            ("Summer 2019", "2019-01-01"),
+            ("in 2019", "2019-01-01"),
+            ("1997", "1997-01-01"),
+        ])
+
+    def test_impossible_dates_fall_back_to_the_year(self):
+        self.assertParses([("2019-02-30", "2019-01-01")])
+
+    def test_unparseable_values(self):
+        self.assertParses([
+            ("", ""),
+            ("n/a", ""),
+            ("null", ""),
+            ("yesterday", ""),
+            ("1750", ""),
+        ])
+
+if __name__ == "__main__":
+    unittest.main()
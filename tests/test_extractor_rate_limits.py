@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import time
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+from src.agents import base, extractor
+from src.agents.extractor import ExtractorAgent, RateLimiter, _AdaptiveConcurrencyLimiter, _RetryBucket
+
+class RateLimitError(Exception):
+    """Stands in for a provider 429, optionally carrying a Retry-After header."""
+
+    def __init__(self, retry_after=None):
+        super().__init__("429 Too Many Requests")
+        headers = {"retry-after": retry_after} if retry_after is not None else {}
+        self.response = SimpleNamespace(headers=headers)
+
+class RaisingProvider:
+    """Raises the scripted errors in order, then answers every call."""
+    model = "fake"
+
+    def __init__(self, *errors, reply="ok"):
+        self.errors = list(errors)
+        self.reply = reply
+        self.calls = 0
+
+    async def call_llm(self, messages, temperature, model=None, json_mode=False):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return self.reply
+
+class RateLimiterTest(unittest.IsolatedAsyncioTestCase):
+    async def test_concurrent_callers_are_spaced_one_interval_apart(self):
+        limiter = RateLimiter(requests_per_minute=1200)  # 50ms interval
+        released = []
+
+        async def caller():
+            await limiter.wait_if_needed()
+            released.append(time.monotonic())
+
+        await asyncio.gather(*(caller() for _ in range(3)))
+
+        gaps = [later - earlier for earlier, later in zip(released, released[1:])]
+        self.assertTrue(all(gap >= 0.04 for gap in gaps), gaps)
+
+class RetryBucketTest(unittest.TestCase):
+    def test_drains_and_refills_up_to_capacity(self):
+        bucket = _RetryBucket(max_tokens=2, deposit_amount=0.5)
+        self.assertTrue(bucket.try_consume())
+        self.assertTrue(bucket.try_consume())
+        self.assertFalse(bucket.try_consume())
+
+        bucket.deposit()
+        bucket.deposit()
+        self.assertTrue(bucket.try_consume())
+
+        for _ in range(10):
+            bucket.deposit()
+        self.assertEqual(bucket.tokens, 2)
+
+class AdaptiveConcurrencyLimiterTest(unittest.IsolatedAsyncioTestCase):
+    def test_rate_limits_halve_and_cooldown_restores_one_slot(self):
+        limiter = _AdaptiveConcurrencyLimiter(max_limit=8, increase_after=2, cooldown_seconds=30)
+        limiter.on_rate_limit()
+        limiter.on_rate_limit()
+        self.assertEqual(limiter.limit, 2)
+
+        # Successes right after a rate limit don't grow the limit
+        limiter.on_success()
+        limiter.on_success()
+        self.assertEqual(limiter.limit, 2)
+
+        limiter._last_rate_limit -= 30
+        limiter.on_success()
+        limiter.on_success()
+        self.assertEqual(limiter.limit, 3)
+
+    async def test_in_flight_never_exceeds_limit(self):
+        limiter = _AdaptiveConcurrencyLimiter(max_limit=4)
+        limiter.on_rate_limit()
+        peak = 0
+
+        async def worker():
+            nonlocal peak
+            async with limiter:
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(worker() for _ in range(6)))
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.in_flight, 0)
+
+class CallLlmWithRetriesTest(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # The retry loop logs every failure; these failures are expected
+        logging.disable(logging.CRITICAL)
+        self.addCleanup(logging.disable, logging.NOTSET)
+        self.waits = []
+        real_sleep = asyncio.sleep
+
+        async def record_sleep(seconds):
+            self.waits.append(seconds)
+            await real_sleep(0)
+
+        for patcher in (mock.patch.object(extractor.asyncio, "sleep", record_sleep),
+                        # Each test scripts its own failures; cached replies would skip them
+                        mock.patch.object(base, "get_llm_cache", return_value=None)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def make_agent(self, provider):
+        agent = ExtractorAgent(provider, max_concurrent_requests=4)
+        agent.rate_limiter.min_interval = 0  # only the retry backoff sleeps
+        return agent
+
+    async def call(self, agent):
+        return await agent._call_llm_with_retries([{"role": "user", "content": "Extract claims."}])
+
+    async def test_rate_limit_honors_retry_after_and_shrinks_concurrency(self):
+        provider = RaisingProvider(RateLimitError(retry_after="7"))
+        agent = self.make_agent(provider)
+
+        self.assertEqual(await self.call(agent), "ok")
+        self.assertEqual(provider.calls, 2)
+        self.assertEqual(self.waits, [7.0])
+        self.assertEqual(agent.semaphore.limit, 2)
+        self.assertAlmostEqual(agent.retry_bucket.tokens, agent.retry_bucket.max_tokens - 1 + 0.1)
+
+    async def test_rate_limit_without_retry_after_backs_off_exponentially(self):
+        provider = RaisingProvider(RateLimitError(), RateLimitError())
+        agent = self.make_agent(provider)
+
+        self.assertEqual(await self.call(agent), "ok")
+        self.assertEqual(self.waits, [agent.request_delay * 10, agent.request_delay * agent.backoff_factor * 10])
+
+    async def test_other_errors_retry_until_max_retries(self):
+        provider = RaisingProvider(*(ConnectionError("connection reset") for _ in range(10)))
+        agent = self.make_agent(provider)
+
+        self.assertIsNone(await self.call(agent))
+        self.assertEqual(provider.calls, agent.max_retries + 1)
+        self.assertEqual(len(self.waits), agent.max_retries)
+
+    async def test_auth_and_context_errors_are_not_retried(self):
+        for error in (PermissionError("401 Unauthorized"), ValueError("maximum context length exceeded")):
+            with self.subTest(error=error):
+                provider = RaisingProvider(error)
+                self.assertIsNone(await self.call(self.make_agent(provider)))
+                self.assertEqual(provider.calls, 1)
+
+    async def test_empty_retry_budget_stops_retrying(self):
+        provider = RaisingProvider(RateLimitError())
+        agent = self.make_agent(provider)
+        agent.retry_bucket.tokens = 0
+
+        self.assertIsNone(await self.call(agent))
+        self.assertEqual(provider.calls, 1)
+        self.assertEqual(self.waits, [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+import json
+import re
+import unittest
+from unittest import mock
+from src.agents import base, fact_checker
+from src.agents.fact_checker import FactCheckerAgent, _claim_key, _excerpt
+
+class FakeProvider:
+    """Answers fact-check prompts: claims whose text contains a supported phrase are supported."""
+
+    model = "fake"
+
+    def __init__(self, supported_phrases):
+        self.supported_phrases = supported_phrases
+        self.checked_claim_ids = []
+
+    async def call_llm(self, messages, temperature=0.7, model=None, json_mode=False):
+        prompt = messages[-1]["content"]
+        claims = re.findall(r'\(ID: ([^)]+)\):\s*(?:Claim Text: )?"([^"]*)"', prompt)
+        if "REQUIRES_MORE_INFO" in prompt:
+            self.checked_claim_ids.extend(claim_id for claim_id, _ in claims)
+            return json.dumps({"results": [{
+                "claim_id": claim_id,
+                "status": "SUPPORTED" if self._supported(text) else "UNSUPPORTED",
+                "contradiction_found": False
+            } for claim_id, text in claims]})
+        return json.dumps({"results": [{
+            "claim_id": claim_id,
+            "supports": self._supported(text),
+            "support_strength": 0.9,
+            "evidence": text
+        } for claim_id, text in claims]})
+
+    def _supported(self, text):
+        return any(phrase in text for phrase in self.supported_phrases)
+
+def make_sources(count=3):
+    return [{"id": f"s{i}", "url": f"https://example.com/{i}", "title": "Apple history",
+             "content": "Apple acquired NeXT in 1997.", "reliability": 5} for i in range(count)]
+
+class ClaimKeyTest(unittest.TestCase):
+    def test_case_and_punctuation_are_ignored(self):
+        self.assertEqual(_claim_key({"claim": "Apple acquired NeXT."}),
+                         _claim_key({"claim": "apple  acquired NeXT"}))
+
+    def test_role_reversed_claims_differ(self):
+        self.assertNotEqual(_claim_key({"claim": "Apple acquired NeXT"}),
+                            _claim_key({"claim": "NeXT acquired Apple"}))
+        self.assertNotEqual(_claim_key({"claim": "Apple acquired NeXT"}),
+                            _claim_key({"claim": "Apple was acquired by NeXT"}))
+
+    def test_dates_differ(self):
+        self.assertNotEqual(_claim_key({"claim": "Apple acquired NeXT", "claim_date": "1997-02-07"}),
+                            _claim_key({"claim": "Apple acquired NeXT", "claim_date": "1996-12-20"}))
+
+class ExcerptTest(unittest.TestCase):
+    def test_short_text_is_not_marked(self):
+        self.assertEqual(_excerpt("Apple was founded in 1976.", 200), "Apple was founded in 1976.")
+
+    def test_truncated_text_is_marked(self):
+        text = "Apple was founded in 1976 by Steve Jobs and Steve Wozniak. " * 50
+        excerpt = _excerpt(text, 20)
+        self.assertTrue(excerpt.endswith("..."))
+        self.assertLess(len(excerpt), len(text))
+
+class UncachedTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        # The fake providers answer per test; a shared response cache would replay earlier ones
+        patcher = mock.patch.object(base, "get_llm_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+class BatchCheckFactsDedupTest(UncachedTestCase):
+    async def test_role_reversed_pair_is_checked_separately(self):
+        provider = FakeProvider(["Apple acquired NeXT"])
+        agent = FactCheckerAgent(provider)
+        claims = [
+            {"id": "1", "claim": "Apple acquired NeXT", "confidence": 0.9},
+            {"id": "2", "claim": "NeXT acquired Apple", "confidence": 0.9},
+        ]
+
+        results = await agent.batch_check_facts(claims, make_sources())
+
+        self.assertEqual(sorted(provider.checked_claim_ids), ["1", "2"])
+        by_id = {r["claim_id"]: r for r in results}
+        self.assertTrue(by_id["1"]["verified"])
+        self.assertFalse(by_id["2"]["verified"])
+        self.assertEqual(by_id["2"]["supporting_sources_count"], 0)
+
+    async def test_duplicates_share_one_check_but_not_lists(self):
+        provider = FakeProvider(["Apple acquired NeXT"])
+        agent = FactCheckerAgent(provider)
+        claims = [
+            {"id": "1", "claim": "Apple acquired NeXT.", "confidence": 0.9},
+            {"id": "2", "claim": "apple acquired NeXT", "confidence": 0.9},
+        ]
+
+        results = await agent.batch_check_facts(claims, make_sources())
+
+        self.assertEqual(provider.checked_claim_ids, ["1"])
+        self.assertEqual([r["claim_id"] for r in results], ["1", "2"])
+        self.assertEqual(results[0]["supporting_sources"], results[1]["supporting_sources"])
+        self.assertIsNot(results[0]["supporting_sources"], results[1]["supporting_sources"])
+        self.assertIsNot(results[0]["contradictions"], results[1]["contradictions"])
+
+class SourceCheckProvider:
+    """Every source supports every claim it is asked about, except contradicting_source, which contradicts it."""
+
+    model = "fake"
+
+    def __init__(self, contradicting_source):
+        self.contradicting_source = contradicting_source
+        self.calls = []
+
+    async def call_llm(self, messages, temperature=0.7, model=None, json_mode=False):
+        prompt = messages[-1]["content"]
+        source_id = re.match(r"Source \(ID: ([^,]+),", prompt).group(1)
+        asks_support = '"supports"' in prompt
+        asks_contradictions = '"contradicts"' in prompt
+        self.calls.append((source_id, asks_support, asks_contradictions))
+        contradicts = source_id == self.contradicting_source
+        return json.dumps({"results": [{
+            "claim_id": claim_id,
+            "supports": asks_support and not contradicts,
+            "support_strength": 0.9,
+            "evidence": "Apple acquired NeXT in 1997.",
+            "contradicts": asks_contradictions and contradicts,
+            "contradiction_strength": 0.8,
+            "contradicting_evidence": "NeXT acquired Apple."
+        } for claim_id in re.findall(r"\(ID: ([^)]+)\): \"", prompt)]})
+
+def ranked_sources(count):
+    # Reliability falls with the index, so s0 is checked first and the last source last
+    return [{"id": f"s{i}", "url": f"https://example.com/{i}", "title": "Apple history",
+             "content_excerpt": "Apple acquired NeXT in 1997.", "reliability": count - i} for i in range(count)]
+
+class SourceCheckEarlyStopTest(UncachedTestCase):
+    async def test_supported_claim_is_still_checked_for_contradictions(self):
+        provider = SourceCheckProvider(contradicting_source="s8")
+        agent = FactCheckerAgent(provider)
+        claims = [{"id": "1", "claim": "Apple acquired NeXT"}]
+
+        with mock.patch.object(fact_checker, "get_nli_classifier", return_value=None):
+            analysis = await agent._analyze_claims_by_source(claims, ranked_sources(9))
+
+        supporting, contradictions = analysis["1"]
+        # Two rounds of three sources give six supporters, past min_sources_required * 2
+        self.assertEqual(len(supporting), 6)
+        self.assertEqual([c["source_id"] for c in contradictions], ["s8"])
+        last_round = [call for call in provider.calls if call[0] in ("s6", "s7", "s8")]
+        self.assertEqual(sorted(last_round), [("s6", False, True), ("s7", False, True), ("s8", False, True)])
+
+    async def test_nli_covers_contradictions_for_stopped_claims(self):
+        provider = SourceCheckProvider(contradicting_source=None)
+        agent = FactCheckerAgent(provider)
+        claims = [{"id": "1", "claim": "Apple acquired NeXT"}]
+
+        def fake_nli(inputs, **kwargs):
+            return [[{"label": "contradiction" if item["text"] == "NeXT acquired Apple." else "entailment",
+                      "score": 0.9}] for item in inputs]
+
+        sources = ranked_sources(9)
+        sources[8]["content_excerpt"] = "NeXT acquired Apple."
+        with mock.patch.object(fact_checker, "get_nli_classifier", return_value=fake_nli):
+            analysis = await agent._analyze_claims_by_source(claims, sources)
+
+        self.assertEqual([c["source_id"] for c in analysis["1"][1]], ["s8"])
+        self.assertNotIn("s8", [call[0] for call in provider.calls])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,21 @@
+import json
+import unittest
+from unittest import mock
+from src.utils import fast_json
+
+class DumpsTest(unittest.TestCase):
+    def test_non_string_keys_match_stdlib(self):
+        data = {1: "founded", 2: ["Apple", "NeXT"]}
+        expected = json.dumps(data, separators=(",", ":"))
+        self.assertEqual(fast_json.dumps(data), expected)
+        with mock.patch.object(fast_json, "orjson", None):
+            self.assertEqual(fast_json.dumps(data), expected)
+
+    def test_sort_keys(self):
+        self.assertEqual(fast_json.dumps({"b": 1, "a": 2}, sort_keys=True), '{"a":2,"b":1}')
+
+    def test_non_ascii_is_not_escaped(self):
+        self.assertEqual(fast_json.dumps({"city": "Zürich"}), '{"city":"Zürich"}')
+
+if __name__ == "__main__":
+    unittest.main()
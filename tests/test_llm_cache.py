@@ -0,0 +1,123 @@
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from src.agents import base
+from src.agents.base import BaseAgent
+from src.llm.cache import LLMCache
+from src.utils import fast_json
+
+MESSAGES = [{"role": "user", "content": "Summarize Apple's history."}]
+
+class FakeClock:
+    def __init__(self, now=1_000_000.0):
+        self.now = now
+
+    def time(self):
+        return self.now
+
+class CacheTestCase(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = str(Path(self.tmp.name) / "llm_cache.sqlite3")
+        self.clock = FakeClock()
+        patcher = mock.patch("src.llm.cache.time.time", self.clock.time)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def make_cache(self, **kwargs) -> LLMCache:
+        return LLMCache(self.db_path, ttl_days=1, **kwargs)
+
+class MakeKeyTest(unittest.TestCase):
+    def test_key_is_deterministic(self):
+        self.assertEqual(LLMCache.make_key("m", 0.0, MESSAGES), LLMCache.make_key("m", 0.0, list(MESSAGES)))
+
+    def test_key_covers_every_request_field(self):
+        key = LLMCache.make_key("m", 0.0, MESSAGES)
+        self.assertNotEqual(key, LLMCache.make_key("other", 0.0, MESSAGES))
+        self.assertNotEqual(key, LLMCache.make_key("m", 0.3, MESSAGES))
+        self.assertNotEqual(key, LLMCache.make_key("m", 0.0, MESSAGES + [{"role": "user", "content": "More."}]))
+        self.assertNotEqual(key, LLMCache.make_key("m", 0.0, MESSAGES, json_mode=True))
+
+    def test_keys_without_json_mode_are_unchanged(self):
+        payload = fast_json.dumps({"m": "m", "t": 0.0, "msgs": MESSAGES}, sort_keys=True)
+        self.assertEqual(LLMCache.make_key("m", 0.0, MESSAGES), hashlib.sha256(payload.encode()).hexdigest())
+
+class TtlTest(CacheTestCase):
+    async def test_entry_expires_after_ttl(self):
+        cache = self.make_cache()
+        await cache.put("k", "response")
+        self.clock.now += 23 * 60 * 60
+        self.assertEqual(await cache.get("k"), "response")
+        self.clock.now += 2 * 60 * 60
+        self.assertIsNone(await cache.get("k"))
+
+    async def test_entry_loaded_from_disk_keeps_its_stored_age(self):
+        await self.make_cache().put("k", "response")
+        self.clock.now += 23 * 60 * 60
+
+        # A fresh process only has the SQLite row; loading it must not reset its age
+        cache = self.make_cache()
+        self.assertEqual(await cache.get("k"), "response")
+        self.clock.now += 2 * 60 * 60
+        self.assertIsNone(await cache.get("k"))
+
+class LruTest(CacheTestCase):
+    async def test_least_recently_used_entry_is_evicted_from_memory(self):
+        cache = self.make_cache(memory_entries=2)
+        await cache.put("a", "A")
+        await cache.put("b", "B")
+        await cache.get("a")  # "a" is now the most recently used
+        await cache.put("c", "C")
+
+        self.assertEqual(list(cache._memory), ["a", "c"])
+        # Evicted entries are still served from SQLite
+        self.assertEqual(await cache.get("b"), "B")
+        self.assertEqual(list(cache._memory), ["c", "b"])
+
+class EchoProvider:
+    model = "fake"
+
+    def __init__(self):
+        self.calls = 0
+
+    async def call_llm(self, messages, temperature=0.7, model=None, json_mode=False):
+        self.calls += 1
+        return f"reply {self.calls}"
+
+class EchoAgent(BaseAgent):
+    async def process(self, input_data):
+        return {}
+
+class CallLlmCachingTest(CacheTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(base, "get_llm_cache", return_value=self.make_cache())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.provider = EchoProvider()
+        self.agent = EchoAgent(self.provider)
+
+    async def test_deterministic_calls_are_cached(self):
+        first = await self.agent.call_llm(MESSAGES, temperature=0.0)
+        self.assertEqual(await self.agent.call_llm(MESSAGES, temperature=0.0), first)
+        self.assertEqual(self.provider.calls, 1)
+
+    async def test_sampled_calls_are_not_cached_by_default(self):
+        self.assertNotEqual(await self.agent.call_llm(MESSAGES, temperature=0.7),
+                            await self.agent.call_llm(MESSAGES, temperature=0.7))
+        self.assertEqual(self.provider.calls, 2)
+
+    async def test_cache_flag_overrides_the_default(self):
+        await self.agent.call_llm(MESSAGES, temperature=0.4, cache=True)
+        await self.agent.call_llm(MESSAGES, temperature=0.4, cache=True)
+        await self.agent.call_llm(MESSAGES, temperature=0.0, cache=False)
+        await self.agent.call_llm(MESSAGES, temperature=0.0, cache=False)
+        self.assertEqual(self.provider.calls, 3)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,26 @@
+import unittest
+from unittest import mock
+from src.config import settings
+from src.llm.openai_provider import OpenAIProvider
+from src.llm.openai_singleton import close_openai_client
+
+class SharedClientTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        patcher = mock.patch.object(settings, "openai_api_key", "test-key")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addAsyncCleanup(close_openai_client)
+
+    async def test_provider_picks_up_a_fresh_client_after_close(self):
+        provider = OpenAIProvider()
+        first = provider.client
+        self.assertIs(provider.client, first)
+
+        await close_openai_client()
+
+        self.assertTrue(first.is_closed())
+        self.assertIsNot(provider.client, first)
+        self.assertFalse(provider.client.is_closed())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import asyncio
+import unittest
+from src.pipeline import ResearchPipeline
+
+class FakeCrawler:
+    async def crawl_url(self, url):
+        return f"content of {url}"
+
+class FakeExtractor:
+    async def process(self, data):
+        return {"claims": [{"claim": s["title"], "source_url": s["url"]} for s in data["sources"]]}
+
+def bare_pipeline():
+    # Skip __init__, which builds the real agents and providers
+    pipeline = object.__new__(ResearchPipeline)
+    pipeline.crawler = FakeCrawler()
+    pipeline.extractor = FakeExtractor()
+    return pipeline
+
+class CrawlExtractOverlapTest(unittest.IsolatedAsyncioTestCase):
+    async def test_extracts_every_crawled_source(self):
+        pipeline = bare_pipeline()
+        sources = [{"url": f"https://example.com/{i}", "title": f"Page {i}"} for i in range(3)]
+        queue = asyncio.Queue()
+
+        crawled, claims = await asyncio.gather(
+            pipeline._crawl_sources(sources, sink=queue),
+            pipeline._extract_facts(queue, "Example"),
+        )
+
+        self.assertEqual(len(crawled), 3)
+        self.assertEqual(sorted(c["claim"] for c in claims), ["Page 0", "Page 1", "Page 2"])
+
+    async def test_failed_crawl_still_releases_the_extractor(self):
+        pipeline = bare_pipeline()
+        queue = asyncio.Queue()
+        crawl = asyncio.create_task(pipeline._crawl_sources(None, sink=queue))  # not sliceable
+        extract = asyncio.create_task(pipeline._extract_facts(queue, "Example"))
+
+        with self.assertRaises(TypeError):
+            await crawl
+        self.assertEqual(await asyncio.wait_for(extract, timeout=1), [])
+
+if __name__ == "__main__":
+    unittest.main()